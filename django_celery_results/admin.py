@@ -1,13 +1,29 @@
 """Result Task Admin interface."""
 
 import logging
+import re
 
 from celery import current_app as celery_app
 from django.conf import settings
 from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ChangeList
+from django.db import router
+from django.db.models import Q
+from django.template.response import TemplateResponse
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
 
-from .models import GroupResult, TaskResult
+from .models import (
+    ALL_STATES,
+    TASK_STATE_CHOICES,
+    GroupResult,
+    TaskResult,
+    TaskResultFacet,
+    TaskResultRollup,
+)
+from .paginator import EstimatedCountPaginator, is_large_table
+from .utils import chunked, get_setting
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +33,136 @@ except (AttributeError, KeyError):
     ALLOW_EDITS = False
     pass
 
+#: Search terms starting with this prefix search the task arguments.
+ARGS_SEARCH_PREFIX = 'args:'
+
+_UUID_RE = re.compile(
+    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+
+
+def id_search_filter(field, term):
+    """Return the filter matching ``term`` as an id or an id prefix.
+
+    A whole UUID is looked up exactly, anything else as a case-sensitive
+    prefix: both can be answered from the index of ``field``.
+    """
+    if _UUID_RE.match(term):
+        return Q(**{field: term})
+    return Q(**{f'{field}__startswith': term})
+
+
+class DeferredChangeList(ChangeList):
+    """Changelist leaving out the payload fields of the model admin.
+
+    The fields in ``changelist_deferred_fields`` of the model admin are
+    neither displayed nor needed by the actions, but can weigh far more
+    than the rest of the row.
+    """
+
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        return queryset.defer(*self.model_admin.changelist_deferred_fields)
+
+
+class StatusListFilter(admin.SimpleListFilter):
+    """List filter offering the Celery states, without querying them."""
+
+    title = _('Task State')
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return TASK_STATE_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(status=self.value())
+
+
+class FacetListFilter(admin.SimpleListFilter):
+    """List filter offering the values recorded as task result facets.
+
+    Reading the small facet table instead of a ``SELECT DISTINCT`` over
+    the task results keeps the changelist fast on large tables.
+    """
+
+    def lookups(self, request, model_admin):
+        values = TaskResultFacet.objects.values_for(self.parameter_name)
+        return [(value, value) for value in values]
+
+    def has_output(self):
+        # Filters left out of the changelist are not applied, a value not
+        # recorded yet must still filter the results.
+        return self.value() is not None or super().has_output()
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(**{self.parameter_name: self.value()})
+
+
+class PeriodicTaskNameListFilter(FacetListFilter):
+    title = _('Periodic Task Name')
+    parameter_name = 'periodic_task_name'
+
+
+class TaskNameListFilter(FacetListFilter):
+    title = _('Task Name')
+    parameter_name = 'task_name'
+
+
+class WorkerListFilter(FacetListFilter):
+    title = _('Worker')
+    parameter_name = 'worker'
+
+
+def delete_batched(modeladmin, request, queryset):
+    """Delete the selected results with batched deletes.
+
+    Unlike Django's ``delete_selected`` action the results are neither
+    loaded nor listed: the confirmation page only shows their number, and
+    the deletion runs by batches of ``CLEANUP_BATCH_SIZE`` rows.  With
+    "Select all" every result matching the current filters is deleted.
+    """
+    opts = modeladmin.model._meta
+    if request.POST.get('post'):
+        result = modeladmin.model._default_manager.delete_batched(
+            queryset, get_setting('CLEANUP_BATCH_SIZE', 100000))
+        modeladmin.message_user(
+            request,
+            ngettext('Deleted %(count)d %(name)s.',
+                     'Deleted %(count)d %(name)s.', result.deleted) % {
+                'count': result.deleted,
+                'name': opts.verbose_name_plural,
+            },
+            messages.SUCCESS,
+        )
+        return None
+
+    # Counted like the changelist, which estimates large tables.
+    count = modeladmin.get_paginator(request, queryset, 1).count
+    context = {
+        **modeladmin.admin_site.each_context(request),
+        'title': _('Are you sure?'),
+        'objects_name': opts.verbose_name_plural,
+        'count': count,
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        'select_across': request.POST.get('select_across') == '1',
+        'action': request.POST.get('action'),
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'opts': opts,
+        'media': modeladmin.media,
+    }
+    request.current_app = modeladmin.admin_site.name
+    return TemplateResponse(
+        request,
+        f'admin/{opts.app_label}/delete_batched_confirmation.html',
+        context,
+    )
+
+
+delete_batched.allowed_permissions = ('delete',)
+delete_batched.short_description = _(
+    'Delete selected %(verbose_name_plural)s without listing them')
+
 
 class TaskResultAdmin(admin.ModelAdmin):
     """Admin-interface for results of tasks."""
@@ -25,12 +171,14 @@ class TaskResultAdmin(admin.ModelAdmin):
     date_hierarchy = 'date_done'
     list_display = ('task_id', 'periodic_task_name', 'task_name', 'date_done',
                     'status', 'worker')
-    list_filter = ('status', 'date_done', 'periodic_task_name', 'task_name',
-                   'worker')
+    list_filter = (StatusListFilter, 'date_done', PeriodicTaskNameListFilter,
+                   TaskNameListFilter, WorkerListFilter)
     readonly_fields = ('date_created', 'date_started', 'date_done',
                        'result', 'meta')
-    search_fields = ('task_name', 'task_id', 'status', 'task_args',
-                     'task_kwargs')
+    search_fields = ('task_id', 'task_name', 'periodic_task_name', 'status')
+    search_help_text = _(
+        'Task id or task name prefix, or state. Prefix with "args:" to '
+        'search the task arguments.')
     fieldsets = (
         (None, {
             'fields': (
@@ -44,6 +192,14 @@ class TaskResultAdmin(admin.ModelAdmin):
             ),
             'classes': ('extrapretty', 'wide')
         }),
+        (_('Workflow'), {
+            'fields': (
+                'parent_id',
+                'root_id',
+                'group_id',
+            ),
+            'classes': ('extrapretty', 'wide')
+        }),
         (_('Parameters'), {
             'fields': (
                 'task_args',
@@ -57,13 +213,54 @@ class TaskResultAdmin(admin.ModelAdmin):
                 'date_created',
                 'date_started',
                 'date_done',
+                'expires_at',
                 'traceback',
                 'meta',
             ),
             'classes': ('extrapretty', 'wide')
         }),
     )
-    actions = ['terminate_task']
+    actions = ['terminate_task', delete_batched]
+    paginator = EstimatedCountPaginator
+    changelist_deferred_fields = ('result', 'meta', 'traceback', 'task_args',
+                                  'task_kwargs')
+
+    def get_changelist(self, request, **kwargs):
+        return DeferredChangeList
+
+    @property
+    def show_full_result_count(self):
+        # Counting the whole table again next to the filtered count is
+        # not worth it once the table is large.
+        return not is_large_table(self.model, router.db_for_read(self.model))
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search with lookups the indexes of the table can answer.
+
+        Searches in the task arguments, which cannot use a regular index,
+        are opt-in: only terms prefixed with :data:`ARGS_SEARCH_PREFIX`
+        look into them.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.startswith(ARGS_SEARCH_PREFIX):
+            term = term[len(ARGS_SEARCH_PREFIX):].strip()
+            return queryset.filter(
+                Q(task_args__icontains=term) | Q(task_kwargs__icontains=term)
+            ), False
+        if _UUID_RE.match(term):
+            return queryset.filter(task_id=term), False
+        query = id_search_filter('task_id', term)
+        query |= Q(task_name__startswith=term)
+        query |= Q(periodic_task_name__startswith=term)
+        if term.upper() in ALL_STATES:
+            query |= Q(status=term.upper())
+        return queryset.filter(query), False
+
+    def delete_queryset(self, request, queryset):
+        self.model._default_manager.delete_batched(
+            queryset, get_setting('CLEANUP_BATCH_SIZE', 100000))
 
     def get_readonly_fields(self, request, obj=None):
         if ALLOW_EDITS:
@@ -75,12 +272,17 @@ class TaskResultAdmin(admin.ModelAdmin):
 
     def terminate_task(self, request, queryset):
         """Terminate selected tasks."""
-        task_ids = list(queryset.values_list('task_id', flat=True))
+        chunk_size = get_setting('BULK_CHUNK_SIZE', 1000)
+        task_ids = queryset.values_list('task_id', flat=True).iterator(
+            chunk_size=chunk_size)
+        terminated = 0
         try:
-            celery_app.control.terminate(task_ids)
+            for chunk in chunked(task_ids, chunk_size):
+                celery_app.control.terminate(chunk)
+                terminated += len(chunk)
             self.message_user(
                 request,
-                f"{len(task_ids)} task(s) was terminated successfully.",
+                f"{terminated} task(s) was terminated successfully.",
                 messages.SUCCESS,
             )
         except Exception as e:
@@ -88,7 +290,7 @@ class TaskResultAdmin(admin.ModelAdmin):
                 "Error while terminating tasks: %s",
                 e,
                 exc_info=True,
-                extra={'task_ids': task_ids}
+                extra={'terminated': terminated}
             )
             self.message_user(
                 request,
@@ -109,8 +311,50 @@ class GroupResultAdmin(admin.ModelAdmin):
     date_hierarchy = 'date_done'
     list_display = ('group_id', 'date_done')
     list_filter = ('date_done',)
-    readonly_fields = ('date_created', 'date_done', 'result')
+    readonly_fields = ('date_created', 'date_done', 'expires_at', 'result')
     search_fields = ('group_id',)
+    search_help_text = _('Group id or group id prefix.')
+    paginator = EstimatedCountPaginator
+    changelist_deferred_fields = ('result',)
+    actions = [delete_batched]
+
+    def get_changelist(self, request, **kwargs):
+        return DeferredChangeList
+
+    def delete_queryset(self, request, queryset):
+        self.model._default_manager.delete_batched(
+            queryset, get_setting('CLEANUP_BATCH_SIZE', 100000))
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        return queryset.filter(id_search_filter('group_id', term)), False
+
+    @property
+    def show_full_result_count(self):
+        return not is_large_table(self.model, router.db_for_read(self.model))
 
 
 admin.site.register(GroupResult, GroupResultAdmin)
+
+
+class TaskResultRollupAdmin(admin.ModelAdmin):
+    """Admin-interface for hourly aggregates of task results."""
+
+    model = TaskResultRollup
+    date_hierarchy = 'period'
+    list_display = ('period', 'task_name', 'status', 'worker', 'count',
+                    'average_runtime', 'max_runtime')
+    list_filter = ('status', 'task_name', 'worker')
+    search_fields = ('task_name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+if get_setting('ROLLUP', False):
+    admin.site.register(TaskResultRollup, TaskResultRollupAdmin)
@@ -0,0 +1,188 @@
+"""Archival of expired results to compressed JSON Lines files."""
+
+import datetime
+import gzip
+import io
+import json
+from tempfile import SpooledTemporaryFile
+from time import monotonic
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from .managers import expiry_result_t
+from .utils import get_setting, now
+
+# Archives larger than this are spooled to disk while being written.
+_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping the microseconds of datetimes."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def get_archive_storage():
+    """Return the storage archives are written to.
+
+    The ``ARCHIVE_STORAGE`` setting is a storage instance or the dotted
+    path to a storage class, Django's default storage is used if unset.
+    """
+    storage = get_setting('ARCHIVE_STORAGE')
+    if storage is None:
+        return default_storage
+    if isinstance(storage, str):
+        return import_string(storage)()
+    return storage
+
+
+def archive_expired(manager, expires, storage=None, policies=None,
+                    rows_per_file=100000, chunk_size=2000,
+                    batch_size=100000, time_budget=None):
+    """Archive then delete the results ``manager`` would expire.
+
+    The expired rows are read in id order, ``rows_per_file`` at a time
+    and streamed from the database by chunks of ``chunk_size``, into
+    gzip compressed JSON Lines files saved to ``storage``.  Once a file
+    is saved the id range it covers is deleted, using the expiry cutoff
+    computed when the call started, so rows are only deleted if they were
+    archived.
+
+    Arguments:
+        manager (ResultManager): Manager of the model to archive.
+        expires (Union[int, datetime.timedelta]): Expiry horizon.
+        storage (django.core.files.storage.Storage): Where to save the
+            archives, see :func:`get_archive_storage`.
+        policies (Sequence[Mapping]): Retention policies.
+        rows_per_file (int): Maximum number of rows per archive.
+        chunk_size (int): Number of rows fetched from the database at once.
+        batch_size (int): Maximum number of rows deleted per statement.
+        time_budget (float): Stop starting new archives after this many
+            seconds.
+
+    Returns:
+        Tuple[expiry_result_t, List[str]]: the outcome of the deletion and
+            the names of the archives saved.
+
+    """
+    storage = storage or get_archive_storage()
+    started = monotonic()
+    prefix = '{}{}/{}'.format(
+        get_setting('ARCHIVE_PATH', 'celery_results_archive/'),
+        manager.model._meta.model_name,
+        now().strftime('%Y%m%dT%H%M%S'),
+    )
+    deleted = batches = 0
+    names = []
+    for field, qs in manager._expired_passes(expires, policies):
+        last_id = 0
+        while True:
+            if time_budget is not None:
+                if monotonic() - started >= time_budget:
+                    return expiry_result_t(
+                        deleted, batches, monotonic() - started, False,
+                    ), names
+            page = qs.filter(id__gt=last_id).order_by('id')[:rows_per_file]
+            archived = _write_archive(page, chunk_size)
+            if archived is None:
+                break
+            data, first_id, last_id = archived
+            with data:
+                names.append(storage.save(
+                    f'{prefix}-{first_id}-{last_id}.jsonl.gz', File(data),
+                ))
+            result = manager._delete_batched(
+                qs.filter(id__gte=first_id, id__lte=last_id), batch_size,
+                field=field,
+            )
+            deleted += result.deleted
+            batches += result.batches
+    return expiry_result_t(deleted, batches, monotonic() - started,
+                           True), names
+
+
+def _write_archive(qs, chunk_size):
+    """Write the rows of ``qs`` to a compressed temporary file.
+
+    Returns ``None`` if ``qs`` is empty, else a ``(file, first_id,
+    last_id)`` tuple, the file being positioned at its start.
+    """
+    data = SpooledTemporaryFile(max_size=_SPOOL_SIZE)
+    first_id = last_id = None
+    with gzip.GzipFile(fileobj=data, mode='wb') as archive:
+        text = io.TextIOWrapper(archive, encoding='utf-8')
+        for row in qs.values().iterator(chunk_size=chunk_size):
+            if first_id is None:
+                first_id = row['id']
+            last_id = row['id']
+            text.write(json.dumps(row, cls=ArchiveEncoder))
+            text.write('\n')
+        text.flush()
+        text.detach()
+    if first_id is None:
+        data.close()
+        return None
+    data.seek(0)
+    return data, first_id, last_id
+
+
+def iter_archive(name, storage=None):
+    """Iterate over the rows saved in the archive ``name``."""
+    storage = storage or get_archive_storage()
+    with storage.open(name, 'rb') as data, \
+            gzip.GzipFile(fileobj=data, mode='rb') as archive:
+        for line in io.TextIOWrapper(archive, encoding='utf-8'):
+            yield json.loads(line)
+
+
+def restore_archive(model, name, storage=None, batch_size=1000):
+    """Insert the rows of the archive ``name`` back into ``model``.
+
+    Rows whose id is already in the table are skipped, so an archive can
+    be restored more than once.  Returns the number of rows restored.
+    """
+    manager = model._default_manager
+    restored = 0
+    batch = []
+    for row in iter_archive(name, storage):
+        batch.append(model(**row))
+        if len(batch) >= batch_size:
+            restored += _restore_batch(manager, batch)
+            batch = []
+    if batch:
+        restored += _restore_batch(manager, batch)
+    return restored
+
+
+def _is_auto_date(field):
+    return getattr(field, 'auto_now', False) or getattr(
+        field, 'auto_now_add', False)
+
+
+def _restore_batch(manager, objs):
+    existing = set(manager.filter(
+        id__in=[obj.id for obj in objs],
+    ).values_list('id', flat=True))
+    objs = [obj for obj in objs if obj.id not in existing]
+    if not objs:
+        return 0
+    # bulk_create() sets the auto_now fields to the current time, the
+    # archived dates are written back afterwards.
+    auto_fields = [
+        field.attname for field in manager.model._meta.concrete_fields
+        if _is_auto_date(field)
+    ]
+    dates = [[getattr(obj, name) for name in auto_fields] for obj in objs]
+    manager.bulk_create(objs, ignore_conflicts=True)
+    if auto_fields:
+        for obj, values in zip(objs, dates):
+            for name, value in zip(auto_fields, values):
+                setattr(obj, name, value)
+        manager.bulk_update(objs, auto_fields, batch_size=len(objs))
+    return len(objs)
@@ -1,20 +1,33 @@
 import binascii
-import json
+from functools import partial
+from time import monotonic
 
 from celery import maybe_signature, states
 from celery.backends.base import BaseDictBackend, get_current_task
 from celery.exceptions import ChordError
-from celery.result import GroupResult, allow_join_result, result_from_tuple
+from celery.result import (
+    GroupResult,
+    ResultSet,
+    allow_join_result,
+    result_from_tuple,
+)
 from celery.utils.log import get_logger
 from celery.utils.serialization import b64decode, b64encode
-from django.db import connection, router, transaction
+from celery.utils.time import maybe_timedelta
+from django.db import connection, connections, router, transaction
 from django.db.models.functions import Now
 from django.db.utils import InterfaceError
+from django.utils.module_loading import import_string
 from kombu.exceptions import DecodeError
 
+from ..archive import archive_expired
+from ..managers import find_policy
 from ..models import ChordCounter
 from ..models import GroupResult as GroupResultModel
-from ..models import TaskResult
+from ..models import GroupResultMember as GroupMemberModel
+from ..models import TaskResult, TaskResultFacet, TaskResultRollup
+from ..partitioning import drop_expired_partitions, is_partitioned
+from ..utils import get_setting, now
 
 EXCEPTIONS_TO_CATCH = (InterfaceError,)
 
@@ -63,6 +76,9 @@ class DatabaseBackend(BaseDictBackend):
             'task_name': None,
             'traceback': None,
             'worker': None,
+            'parent_id': None,
+            'root_id': None,
+            'group_id': None,
         }
         if request and self.app.conf.find_value_for_key('extended', 'result'):
 
@@ -96,6 +112,9 @@ class DatabaseBackend(BaseDictBackend):
                 'task_name': getattr(request, 'task', None),
                 'traceback': traceback,
                 'worker': getattr(request, 'hostname', None),
+                'parent_id': getattr(request, 'parent_id', None),
+                'root_id': getattr(request, 'root_id', None),
+                'group_id': getattr(request, 'group', None),
             })
 
         return extended_props
@@ -144,13 +163,51 @@ class DatabaseBackend(BaseDictBackend):
         task_props.update(
             self._get_extended_properties(request, traceback)
         )
+        task_props['expires_at'] = self._get_expires_at(request, task_props)
 
         if status == states.STARTED:
             task_props['date_started'] = Now()
 
-        self.TaskModel._default_manager.store_result(**task_props)
+        obj = self.TaskModel._default_manager.store_result(**task_props)
+        # Values new to this process are added to the admin filters.
+        TaskResultFacet._default_manager.record(task_props, using=using)
+        group_id = getattr(request, 'group', None)
+        if group_id and get_setting('GROUP_COUNTERS', False):
+            self._count_group_task(group_id, obj, using=using)
         return result
 
+    def _count_group_task(self, group_id, obj, using=None):
+        """Count the task result ``obj`` in its group once it finished.
+
+        Tasks stored again in a ready state are counted only once.
+        """
+        if obj.status in states.READY_STATES:
+            self.GroupModel._default_manager.count_ready_task(
+                group_id, obj.task_id, obj.status, using=using)
+
+    def _get_expires_at(self, request, task_props):
+        """Return when the task result about to be stored can be deleted.
+
+        The expiry is taken from the ``result_expires`` attribute of the
+        task, then from the first matching retention policy, and finally
+        from :setting:`result_expires`.
+        """
+        task = self.app.tasks.get(getattr(request, 'task', None))
+        expires = getattr(task, 'result_expires', None)
+        if expires is None:
+            policy = find_policy(
+                get_setting('RETENTION_POLICIES'), task_props)
+            if policy is not None:
+                # A policy without horizon keeps the result forever.
+                expires = policy['expires']
+                if expires is None:
+                    return None
+        if expires is None:
+            expires = self.expires or None
+        if expires is None:
+            return None
+        return now() + maybe_timedelta(expires)
+
     def _get_task_meta_for(self, task_id):
         """Get task metadata for a task by id."""
         obj = self.TaskModel._default_manager.get_task(task_id)
@@ -191,17 +248,144 @@ class DatabaseBackend(BaseDictBackend):
             return self.decode(content)
 
     def _forget(self, task_id):
-        try:
-            self.TaskModel._default_manager.get(task_id=task_id).delete()
-        except self.TaskModel.DoesNotExist:
-            pass
+        self.TaskModel._default_manager.delete_tasks([task_id])
+
+    def forget_many(self, task_ids):
+        """Forget the results of ``task_ids`` with chunked bulk deletes.
+
+        Returns the number of results deleted.
+        """
+        task_ids = list(task_ids)
+        for task_id in task_ids:
+            self._cache.pop(task_id, None)
+        return self.TaskModel._default_manager.delete_tasks(
+            task_ids, chunk_size=get_setting('BULK_CHUNK_SIZE', 1000))
+
+    def forget_result_set(self, result_set):
+        """Forget all the results of a result set or group at once.
+
+        Bulk equivalent of :meth:`celery.result.ResultSet.forget`, which
+        forgets one result at a time: the results of the set, of their
+        parents and of nested sets are deleted with chunked bulk deletes.
+        For a :class:`~celery.result.GroupResult` the saved group is
+        deleted too.  Returns the number of task results deleted.
+        """
+        task_ids, group_ids = [], []
+        pending = [result_set]
+        while pending:
+            result = pending.pop()
+            if isinstance(result, ResultSet):
+                if isinstance(result, GroupResult) and result.id:
+                    group_ids.append(result.id)
+                pending.extend(result.results)
+                continue
+            while result is not None:
+                result._cache = None
+                self.remove_pending_result(result)
+                task_ids.append(result.id)
+                result = result.parent
+        for group_id in group_ids:
+            self._cache.pop(group_id, None)
+        self.GroupModel._default_manager.delete_groups(group_ids)
+        return self.forget_many(task_ids)
+
+    def _cleanup_options(self):
+        """Return the ``delete_expired`` options set in the settings."""
+        lag_probe = get_setting('CLEANUP_LAG_PROBE')
+        if isinstance(lag_probe, str):
+            lag_probe = import_string(lag_probe)
+        return {
+            'batch_size': get_setting('CLEANUP_BATCH_SIZE', 100000),
+            'time_budget': get_setting('CLEANUP_TIME_BUDGET'),
+            'rate': get_setting('CLEANUP_RATE'),
+            'pause': get_setting('CLEANUP_PAUSE', 0),
+            'lag_probe': lag_probe,
+            'max_lag': get_setting('CLEANUP_MAX_LAG'),
+            'max_lag_wait': get_setting('CLEANUP_MAX_LAG_WAIT', 600),
+        }
 
     def cleanup(self):
         """Delete expired metadata."""
-        if not self.expires:
+        policies = get_setting('RETENTION_POLICIES')
+        archive = get_setting('ARCHIVE', False)
+        options = self._cleanup_options()
+        time_budget = options.pop('time_budget')
+        if get_setting('ROLLUP', False):
+            # Aggregates must be taken before the results are gone.
+            started = monotonic()
+            rows = TaskResultRollup.objects.rollup()
+            logger.info('Rolled up task results into %d row(s) in %.2fs.',
+                        rows, monotonic() - started)
+        self._drop_expired_partitions(policies)
+        # Counters of chords whose header tasks were lost or revoked are
+        # expired along with the results.
+        for model in (self.TaskModel, self.GroupModel, ChordCounter):
+            manager = model._default_manager
+            model_policies = policies if model is self.TaskModel else None
+            # Results stored with a deadline expire even without a horizon.
+            if not (self.expires or model_policies or manager.expires_field):
+                continue
+            name = model._meta.verbose_name_plural
+            if archive and model is not ChordCounter:
+                result, names = archive_expired(
+                    manager, self.expires or None,
+                    policies=model_policies,
+                    batch_size=options['batch_size'],
+                    time_budget=time_budget,
+                )
+                logger.info('Archived %d %s to %d file(s).',
+                            result.deleted, name, len(names))
+            else:
+                result = manager.delete_expired(
+                    self.expires or None,
+                    time_budget=time_budget,
+                    progress=partial(_log_cleanup_progress, name),
+                    policies=model_policies,
+                    **options
+                )
+            logger.info(
+                'Deleted %d expired %s in %.2fs (%d batches).',
+                result.deleted, name, result.elapsed, result.batches,
+            )
+            self._maybe_run_maintenance(manager, name, result.deleted)
+            if model is self.TaskModel:
+                pruned = TaskResultFacet._default_manager.prune()
+                logger.info('Pruned %d unused task result facet(s).', pruned)
+            elif model is self.GroupModel:
+                pruned = GroupMemberModel._default_manager.prune()
+                logger.info('Pruned %d group result member(s).', pruned)
+            if time_budget is not None:
+                time_budget -= result.elapsed
+                if not result.complete or time_budget <= 0:
+                    logger.info('Cleanup time budget exhausted.')
+                    return
+
+    def _maybe_run_maintenance(self, manager, name, deleted):
+        """Run table maintenance once enough rows were deleted."""
+        threshold = get_setting('MAINTENANCE_THRESHOLD')
+        if threshold is None or deleted < threshold:
             return
-        self.TaskModel._default_manager.delete_expired(self.expires)
-        self.GroupModel._default_manager.delete_expired(self.expires)
+        result = manager.run_maintenance(
+            optimize=get_setting('MAINTENANCE_OPTIMIZE', False))
+        logger.info(
+            'Ran maintenance of %s in %.2fs: %s',
+            name, result.elapsed, '; '.join(result.statements),
+        )
+
+    def _drop_expired_partitions(self, policies):
+        """Drop the expired partitions of a partitioned task result table."""
+        db = connections[router.db_for_write(self.TaskModel)]
+        if not is_partitioned(db, self.TaskModel._meta.db_table):
+            return
+        started = monotonic()
+        dropped = drop_expired_partitions(
+            db, self.TaskModel, self.expires or None, policies,
+            detach_only=get_setting('PARTITION_DETACH_ONLY', False),
+        )
+        logger.info(
+            'Removed %d expired task result partition(s) in %.2fs.',
+            len(dropped), monotonic() - started,
+        )
 
     def _restore_group(self, group_id):
         """return result value for a group by id."""
@@ -220,16 +404,59 @@ class DatabaseBackend(BaseDictBackend):
         content_type, content_encoding, result = self.encode_content(
             group_result.as_tuple()
         )
-        self.GroupModel._default_manager.store_group_result(
-            content_type, content_encoding, group_id, result
-        )
+        expires_at = None
+        if self.expires:
+            expires_at = now() + maybe_timedelta(self.expires)
+        task_ids = [result.id for result in group_result.results]
+        counters = None
+        if get_setting('GROUP_COUNTERS', False):
+            counters = {
+                'total': len(set(task_ids)), 'succeeded': 0, 'failed': 0,
+            }
+        # A group is never saved without its members.
+        with transaction.atomic(using=router.db_for_write(self.GroupModel)):
+            self.GroupModel._default_manager.store_group_result(
+                content_type, content_encoding, group_id, result,
+                expires_at=expires_at, counters=counters,
+            )
+            GroupMemberModel._default_manager.store_members(
+                group_id, task_ids,
+                batch_size=get_setting('BULK_CHUNK_SIZE', 1000),
+            )
+        if counters is not None:
+            # Only once the members are committed: the tasks finishing
+            # from then on count themselves.
+            self.GroupModel._default_manager.count_ready_tasks(group_id)
         return group_result
 
     def _delete_group(self, group_id):
-        try:
-            self.GroupModel._default_manager.get_group(group_id).delete()
-        except self.TaskModel.DoesNotExist:
-            pass
+        self.GroupModel._default_manager.delete_groups([group_id])
+        GroupMemberModel._default_manager.filter(
+            group_id=group_id).delete()
+
+    def group_progress(self, group_id):
+        """Return the progress of the saved group ``group_id``.
+
+        The tasks of the group are counted by state with one query on
+        the recorded members of the group.  The members of groups saved
+        before they were recorded are restored from the group and counted
+        with one query per chunk of ``BULK_CHUNK_SIZE`` tasks.
+
+        Returns:
+            ~django_celery_results.managers.group_progress_t: the progress
+                of the group, ``None`` if the group is unknown.
+
+        """
+        progress = GroupMemberModel._default_manager.get_progress(group_id)
+        if progress is None:
+            group = self.restore_group(group_id)
+            if group is None:
+                return None
+            progress = self.TaskModel._default_manager.get_progress(
+                [result.id for result in group.results],
+                chunk_size=get_setting('BULK_CHUNK_SIZE', 1000),
+            )
+        return progress
 
     def apply_chord(self, header_result_args, body, **kwargs):
         """Add a ChordCounter with the expected number of results"""
@@ -239,9 +466,9 @@ class DatabaseBackend(BaseDictBackend):
         else:
             # celery <5.1 will pass a GroupResult object
             header_result = header_result_args
-        results = [r.as_tuple() for r in header_result]
+        results = header_result.results
         chord_size = body.get("chord_size", None) or len(results)
-        data = json.dumps(results)
+        data = ChordCounter.encode_sub_tasks(results)
         ChordCounter.objects.create(
             group_id=header_result.id, sub_tasks=data, count=chord_size
         )
@@ -267,7 +494,7 @@ class DatabaseBackend(BaseDictBackend):
                 return
             chord_counter.count -= 1
             if chord_counter.count != 0:
-                chord_counter.save(update_fields=["count"])
+                chord_counter.save(update_fields=["count", "date_updated"])
             else:
                 # Last task in the chord header has finished
                 call_callback = True
@@ -284,6 +511,14 @@ class DatabaseBackend(BaseDictBackend):
                 )
 
 
+def _log_cleanup_progress(name, progress):
+    logger.debug(
+        'Cleanup batch %d: deleted %d %s in %.3fs (%d in %.2fs).',
+        progress.batch, progress.deleted, name, progress.duration,
+        progress.total, progress.elapsed,
+    )
+
+
 def trigger_callback(app, callback, group_result):
     """Add the callback to the queue or mark the callback as failed
     Implementation borrowed from `celery.app.builtins.unlock_chord`
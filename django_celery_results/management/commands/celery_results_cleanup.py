@@ -0,0 +1,147 @@
+"""Delete expired results from a pool of workers."""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from time import monotonic, time
+
+import django
+from celery import current_app as celery_app
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from django_celery_results.utils import get_setting
+
+#: Models cleaned up by the command, as ``app_label.ModelName``.
+MODELS = (
+    'django_celery_results.TaskResult',
+    'django_celery_results.GroupResult',
+)
+
+
+def _delete_range(label, expires, policies, batch_size, deadline, id_range):
+    """Delete the expired rows of one id range, in a pool worker."""
+    manager = apps.get_model(label)._default_manager
+    time_budget = None
+    if deadline is not None:
+        time_budget = max(deadline - time(), 0)
+    try:
+        return manager.delete_expired(
+            expires, batch_size=batch_size, time_budget=time_budget,
+            policies=policies, id_range=id_range,
+        )
+    finally:
+        # Every thread or process has its own connections.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Delete expired task and group results in parallel.
+
+    The ids of the expired rows are split into ranges deleted
+    concurrently by ``--workers`` threads (or processes with
+    ``--processes``), each with its own database connection.  This is
+    meant to catch up with large backlogs, ``celery.backend_cleanup``
+    remains the way to keep up with the daily volume.
+    """
+
+    help = 'Delete expired task and group results from a pool of workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--expires', type=float, default=None,
+            help='Expiry horizon in seconds '
+                 '(default: the result_expires setting).',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of concurrent workers (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Run the workers in processes instead of threads.',
+        )
+        parser.add_argument(
+            '--ranges-per-worker', type=int, default=4,
+            help='Number of id ranges per worker (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=get_setting('CLEANUP_BATCH_SIZE', 100000),
+            help='Maximum number of rows deleted per statement '
+                 '(default: %(default)s).',
+        )
+        parser.add_argument(
+            '--time-budget', type=float, default=None,
+            help='Stop starting new batches after this many seconds.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the expired rows.',
+        )
+
+    def handle(self, *args, **options):
+        expires = options['expires']
+        if expires is None:
+            expires = celery_app.conf.result_expires
+        policies = get_setting('RETENTION_POLICIES')
+        workers = max(options['workers'], 1)
+        deadline = None
+        if options['time_budget'] is not None:
+            deadline = time() + options['time_budget']
+
+        for label in MODELS:
+            model = apps.get_model(label)
+            name = model._meta.verbose_name_plural
+            manager = model._default_manager
+            ranges = manager.split_expired(
+                expires, policies,
+                parts=workers * max(options['ranges_per_worker'], 1),
+            )
+            if options['dry_run']:
+                count = manager.count_expired(expires, policies)
+                self.stdout.write(
+                    f'{name}: {count} expired row(s) '
+                    f'in {len(ranges)} id range(s).'
+                )
+                continue
+
+            started = monotonic()
+            results = self._run(label, ranges, workers, options['processes'],
+                                expires, policies, options['batch_size'],
+                                deadline)
+            elapsed = monotonic() - started
+            deleted = sum(result.deleted for result in results)
+            rate = deleted / elapsed if elapsed else 0
+            self.stdout.write(
+                f'{name}: deleted {deleted} row(s) in {elapsed:.2f}s '
+                f'({rate:.0f} rows/s, {len(ranges)} id range(s)).'
+            )
+            if not all(result.complete for result in results):
+                self.stdout.write(
+                    f'{name}: time budget exhausted, run again to delete '
+                    'the remaining rows.'
+                )
+            threshold = get_setting('MAINTENANCE_THRESHOLD')
+            if threshold is not None and deleted >= threshold:
+                maintenance = manager.run_maintenance(
+                    optimize=get_setting('MAINTENANCE_OPTIMIZE', False))
+                self.stdout.write(
+                    f'{name}: ran maintenance in '
+                    f'{maintenance.elapsed:.2f}s.'
+                )
+
+    def _run(self, label, ranges, workers, processes, expires, policies,
+             batch_size, deadline):
+        if not ranges:
+            return []
+        if processes:
+            # Forked children must not share the connections of the parent.
+            connections.close_all()
+            pool = ProcessPoolExecutor(workers, initializer=django.setup)
+        else:
+            pool = ThreadPoolExecutor(workers)
+        delete_range = partial(
+            _delete_range, label, expires, policies, batch_size, deadline)
+        with pool:
+            return list(pool.map(delete_range, ranges))
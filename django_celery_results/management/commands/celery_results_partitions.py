@@ -0,0 +1,91 @@
+"""Manage the partitions of the task result table on PostgreSQL."""
+
+from celery import current_app as celery_app
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from django_celery_results.models import TaskResult
+from django_celery_results.partitioning import (
+    INTERVALS,
+    create_partitions,
+    drop_expired_partitions,
+    get_partitions,
+    is_partitioned,
+    setup_partitioning,
+)
+from django_celery_results.utils import get_setting
+
+
+class Command(BaseCommand):
+    """Create the upcoming partitions of the task result table.
+
+    Meant to be run periodically, e.g. daily from cron, so that results
+    always land in a partition of their own interval rather than in the
+    default partition.  See :mod:`django_celery_results.partitioning`.
+    """
+
+    help = 'Create, list and drop partitions of the task result table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--setup', action='store_true',
+            help='Turn the task result table into a partitioned table.',
+        )
+        parser.add_argument(
+            '--interval', choices=sorted(INTERVALS),
+            help='Width of the partitions '
+                 '(default: the PARTITION_INTERVAL setting or day).',
+        )
+        parser.add_argument(
+            '--premake', type=int, default=7,
+            help='Number of upcoming intervals to create partitions for '
+                 '(default: %(default)s).',
+        )
+        parser.add_argument(
+            '--drop-expired', action='store_true',
+            help='Drop the partitions holding only expired results.',
+        )
+        parser.add_argument(
+            '--detach-only', action='store_true',
+            help='Detach the expired partitions instead of dropping them.',
+        )
+        parser.add_argument(
+            '--list', action='store_true',
+            help='List the partitions.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_write(TaskResult)]
+        table = TaskResult._meta.db_table
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning requires PostgreSQL.')
+
+        if options['setup']:
+            if is_partitioned(connection, table):
+                raise CommandError(f'{table} is already partitioned.')
+            setup_partitioning(connection, TaskResult, options['interval'])
+            self.stdout.write(f'{table} is now partitioned.')
+        elif not is_partitioned(connection, table):
+            raise CommandError(
+                f'{table} is not partitioned, run with --setup first.')
+
+        for name in create_partitions(connection, TaskResult,
+                                      options['premake'],
+                                      options['interval']):
+            self.stdout.write(f'Created {name}.')
+
+        if options['drop_expired']:
+            dropped = drop_expired_partitions(
+                connection, TaskResult,
+                celery_app.conf.result_expires,
+                get_setting('RETENTION_POLICIES'),
+                detach_only=options['detach_only'],
+            )
+            verb = 'Detached' if options['detach_only'] else 'Dropped'
+            for name in dropped:
+                self.stdout.write(f'{verb} {name}.')
+
+        if options['list']:
+            for name, upper in get_partitions(connection, table):
+                until = upper.isoformat() if upper else 'default'
+                self.stdout.write(f'{name}  until={until}')
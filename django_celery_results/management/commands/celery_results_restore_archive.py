@@ -0,0 +1,43 @@
+"""Restore archived results."""
+
+import posixpath
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from django_celery_results.archive import restore_archive
+
+MODELS = ('taskresult', 'groupresult')
+
+
+class Command(BaseCommand):
+    """Insert the rows of result archives back into their table.
+
+    Archives are written by ``celery.backend_cleanup`` when the
+    ``ARCHIVE`` setting is enabled, under a directory named after the
+    model they belong to.
+    """
+
+    help = 'Restore archived task or group results.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='+',
+            help='Names of the archives in the archive storage.',
+        )
+        parser.add_argument(
+            '--model', choices=MODELS,
+            help='Model the archives belong to '
+                 '(default: guessed from their directory).',
+        )
+
+    def handle(self, *args, **options):
+        for name in options['names']:
+            model_name = options['model'] or posixpath.basename(
+                posixpath.dirname(name))
+            if model_name not in MODELS:
+                raise CommandError(
+                    f'Cannot guess the model of {name}, use --model.')
+            model = apps.get_model('django_celery_results', model_name)
+            restored = restore_archive(model, name)
+            self.stdout.write(f'{name}: restored {restored} row(s).')
@@ -0,0 +1,41 @@
+"""Report chords whose counter was not decremented for a while."""
+
+from django.core.management.base import BaseCommand
+
+from django_celery_results.models import ChordCounter
+
+
+class Command(BaseCommand):
+    """List stalled :class:`~django_celery_results.models.ChordCounter` rows.
+
+    A chord is considered stalled when none of its header tasks finished
+    for longer than ``--threshold`` seconds, which usually means some of
+    them were lost or revoked and the callback will never be called.
+    """
+
+    help = 'List chords whose header tasks stopped reporting.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=int, default=3600,
+            help='Seconds since the last finished header task '
+                 '(default: %(default)s).',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=100,
+            help='Maximum number of chords to list (default: %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        stalled = ChordCounter.objects.get_stalled(options['threshold'])
+        total = stalled.count()
+        rows = stalled.values_list(
+            'group_id', 'count', 'date_created', 'date_updated',
+        )[:options['limit']]
+        for group_id, count, date_created, date_updated in rows:
+            self.stdout.write(
+                f'{group_id}  remaining={count}  '
+                f'created={date_created.isoformat()}  '
+                f'updated={date_updated.isoformat()}'
+            )
+        self.stdout.write(f'{total} stalled chord(s).')
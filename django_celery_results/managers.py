@@ -1,14 +1,56 @@
 """Model managers."""
 
+import logging
 import warnings
+from collections import Counter, namedtuple
+from datetime import timedelta
 from functools import wraps
 from itertools import count
+from time import monotonic, sleep
 
+from celery import states
 from celery.utils.time import maybe_timedelta
 from django.conf import settings
 from django.db import connections, models, router, transaction
+from django.db.models import (
+    Count,
+    DurationField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Sum,
+)
+from django.db.models.functions import TruncHour
 
-from .utils import now
+from .partitioning import is_partitioned, lock_task_id
+from .utils import chunked, now
+
+logger = logging.getLogger(__name__)
+
+#: Outcome of :meth:`ResultManager.delete_expired`.
+expiry_result_t = namedtuple('expiry_result_t', (
+    'deleted', 'batches', 'elapsed', 'complete',
+))
+
+#: Outcome of :meth:`ResultManager.run_maintenance`.
+maintenance_result_t = namedtuple('maintenance_result_t', (
+    'statements', 'elapsed',
+))
+
+#: Progress report passed to the ``progress`` callback of
+#: :meth:`ResultManager.delete_expired` after each batch.
+expiry_progress_t = namedtuple('expiry_progress_t', (
+    'batch', 'deleted', 'total', 'duration', 'elapsed',
+))
+
+#: Progress of a group, see :func:`group_progress`.
+group_progress_t = namedtuple('group_progress_t', (
+    'total', 'completed', 'failed', 'ready', 'states',
+))
 
 W_ISOLATION_REP = """
 Polling results with transaction isolation level 'repeatable-read'
@@ -53,9 +95,87 @@ def transaction_retry(max_retries=1):
     return _outer
 
 
+def _policy_match(policy):
+    """Return the filter selecting the rows covered by a retention policy.
+
+    Every key of ``policy`` but ``expires`` is a field name: a string value
+    ending with ``*`` matches by prefix, a list, tuple or set matches any of
+    its items and any other value matches exactly.
+    """
+    lookups = {}
+    for field, value in policy.items():
+        if field == 'expires':
+            continue
+        if isinstance(value, str) and value.endswith('*'):
+            lookups[f'{field}__startswith'] = value[:-1]
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            lookups[f'{field}__in'] = value
+        else:
+            lookups[field] = value
+    return Q(**lookups)
+
+
+def _policy_value_matches(pattern, value):
+    if isinstance(pattern, str) and pattern.endswith('*'):
+        return isinstance(value, str) and value.startswith(pattern[:-1])
+    if isinstance(pattern, (list, tuple, set, frozenset)):
+        return value in pattern
+    return value == pattern
+
+
+def group_progress(total, counts):
+    """Return the progress of a group of ``total`` tasks.
+
+    Arguments:
+        total (int): Number of tasks of the group.
+        counts (Mapping): Number of stored tasks by state, the others are
+            counted as ``PENDING``.
+
+    Returns:
+        group_progress_t: the number of tasks, of finished and of failed
+            tasks, whether all of them finished and the number of tasks
+            by state.
+
+    """
+    counts = dict(counts)
+    missing = total - sum(counts.values())
+    if missing > 0:
+        counts[states.PENDING] = counts.get(states.PENDING, 0) + missing
+    completed = sum(
+        count for state, count in counts.items()
+        if state in states.READY_STATES
+    )
+    return group_progress_t(
+        total, completed, counts.get(states.FAILURE, 0),
+        completed == total, counts,
+    )
+
+
+def find_policy(policies, values):
+    """Return the first retention policy matching ``values``, if any.
+
+    This is the Python counterpart of the filters used by
+    :meth:`ResultManager.get_expired_by_policy`, ``values`` mapping
+    field names to the values about to be stored.
+    """
+    for policy in policies or ():
+        if all(_policy_value_matches(pattern, values.get(field))
+               for field, pattern in policy.items() if field != 'expires'):
+            return policy
+
+
 class ResultManager(models.Manager):
     """Generic manager for celery results."""
 
+    #: Datetime field compared to the expiry horizon, it is also the
+    #: leading column of the keyset walked by :meth:`delete_expired`.
+    expiry_field = 'date_done'
+
+    #: Datetime field holding the deadline of each row, if the model has
+    #: one.  Rows where it is set are deleted once it is past, whatever
+    #: the expiry horizon.
+    expires_field = None
+
     def warn_if_repeatable_read(self):
         if 'mysql' in self.current_engine().lower():
             cursor = self.connection_for_read().cursor()
@@ -80,25 +200,357 @@ class ResultManager(models.Manager):
         except AttributeError:
             return settings.DATABASE_ENGINE
 
+    def maintenance_statements(self, vendor, optimize=False):
+        """Return the maintenance statements run after large deletions.
+
+        Arguments:
+            vendor (str): Database vendor, as in ``connection.vendor``.
+            optimize (bool): Also rebuild the table on MySQL, which
+                returns the space of deleted rows but copies the table.
+
+        """
+        table = connections[self._write_db()].ops.quote_name(
+            self.model._meta.db_table)
+        if vendor == 'postgresql':
+            return [f'VACUUM (ANALYZE) {table}']
+        if vendor == 'mysql':
+            if optimize:
+                return [f'OPTIMIZE TABLE {table}']
+            return [f'ANALYZE TABLE {table}']
+        if vendor == 'sqlite':
+            # Only returns pages to the OS with auto_vacuum=INCREMENTAL.
+            return ['PRAGMA incremental_vacuum', f'ANALYZE {table}']
+        return []
+
+    def run_maintenance(self, optimize=False):
+        """Refresh planner statistics and reclaim space of deleted rows.
+
+        Runs VACUUM (ANALYZE) on PostgreSQL, ANALYZE TABLE (or OPTIMIZE
+        TABLE with ``optimize``) on MySQL and incremental_vacuum and
+        ANALYZE on SQLite.  VACUUM cannot run in a transaction, nothing
+        is done inside an atomic block.
+
+        Returns:
+            maintenance_result_t: statements run and seconds elapsed.
+
+        """
+        connection = connections[self._write_db()]
+        started = monotonic()
+        if connection.in_atomic_block:
+            logger.warning('Skipping maintenance of %s in a transaction.',
+                           self.model._meta.db_table)
+            return maintenance_result_t([], 0)
+        statements = self.maintenance_statements(connection.vendor, optimize)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+                if connection.vendor != 'postgresql':
+                    # MySQL returns a status result set, and SQLite only
+                    # runs incremental_vacuum as its rows are fetched.
+                    cursor.fetchall()
+        return maintenance_result_t(statements, monotonic() - started)
+
     def get_all_expired(self, expires):
         """Get all expired results."""
-        return self.filter(date_done__lt=now() - maybe_timedelta(expires))
+        return self.filter(**{
+            f'{self.expiry_field}__lt': now() - maybe_timedelta(expires),
+        })
 
-    def delete_expired(self, expires, batch_size=100000):
-        """Delete all expired results."""
-        qs = self.get_all_expired(expires).order_by("id")
+    def get_expired_by_policy(self, expires, policies=None):
+        """Get the expired results, one queryset per retention policy.
 
-        while True:
-            ids = list(qs.values_list("id", flat=True)[:batch_size])
-            if not ids:
+        Each policy is a mapping of field values to match (see
+        :func:`_policy_match`) and an ``expires`` horizon, ``None``
+        keeping the matched rows forever.  A row is governed by the first
+        policy matching it, rows matched by no policy expire after
+        ``expires`` (or are kept if it is ``None``).
+        """
+        querysets = []
+        covered = Q()
+        for policy in policies or ():
+            match = _policy_match(policy)
+            if policy['expires'] is not None:
+                querysets.append(
+                    self.get_all_expired(policy['expires'])
+                    .filter(match).exclude(covered)
+                )
+            covered |= match
+        if expires is not None:
+            querysets.append(self.get_all_expired(expires).exclude(covered))
+        return querysets
+
+    def delete_expired(self, expires, batch_size=100000, time_budget=None,
+                       rate=None, pause=0, lag_probe=None, max_lag=None,
+                       max_lag_wait=600, progress=None, policies=None,
+                       id_range=None):
+        """Delete all expired results.
+
+        Rows are deleted in batches walking the ``(expiry_field, id)``
+        keyset: each batch only fetches the key of its last row and then
+        deletes by range, so memory use and statement size do not depend
+        on the number of expired rows.  On MySQL the batches are plain
+        ``DELETE ... ORDER BY ... LIMIT`` statements.
+
+        With retention ``policies``, one such range delete is run per
+        policy, see :meth:`get_expired_by_policy`.  For models with an
+        :attr:`expires_field`, rows whose deadline is past are deleted by
+        a range delete on it first, rows without a deadline (stored by
+        older versions) then go through the horizon and the policies.
+
+        Arguments:
+            expires (Union[int, datetime.timedelta]): Expiry horizon,
+                ``None`` only deletes the rows expired by ``policies``.
+            batch_size (int): Maximum number of rows deleted per batch.
+            time_budget (float): Stop starting new batches after this many
+                seconds.  As deleted rows are gone, calling the method
+                again resumes where the previous run stopped.
+            rate (float): Target number of rows deleted per second, the
+                method sleeps between batches to stay below it.
+            pause (float): Minimum number of seconds to sleep between
+                batches.
+            lag_probe (Callable[[], float]): Called before each batch,
+                returns the current replication lag in seconds.
+            max_lag (float): Wait while ``lag_probe`` reports more than
+                this many seconds of lag.
+            max_lag_wait (float): Give up the run when the lag stays above
+                ``max_lag`` for this many seconds in a row.  The run is
+                also stopped if ``lag_probe`` raises.
+            progress (Callable[[expiry_progress_t], None]): Called after
+                each batch.
+            policies (Sequence[Mapping]): Retention policies.
+            id_range (Tuple[int, int]): Only delete the rows whose id is in
+                this half-open range, see :meth:`split_expired`.
+
+        Returns:
+            expiry_result_t: rows deleted, batches run, seconds elapsed
+                and whether every expired row was deleted.
+
+        """
+        started = monotonic()
+        deleted = batches = 0
+        passes = self._expired_passes(expires, policies, id_range)
+        for field, qs in passes:
+            budget = time_budget
+            if time_budget is not None:
+                budget = time_budget - (monotonic() - started)
+                if budget <= 0:
+                    break
+            if not qs.using(self._write_db()).exists():
+                continue
+            result = self._delete_batched(
+                qs, batch_size, field=field,
+                time_budget=budget, rate=rate, pause=pause,
+                lag_probe=lag_probe, max_lag=max_lag,
+                max_lag_wait=max_lag_wait, progress=progress,
+            )
+            deleted += result.deleted
+            batches += result.batches
+            if not result.complete:
+                break
+        else:
+            return expiry_result_t(deleted, batches, monotonic() - started,
+                                   True)
+        return expiry_result_t(deleted, batches, monotonic() - started,
+                               False)
+
+    def count_expired(self, expires, policies=None, id_range=None):
+        """Count the rows :meth:`delete_expired` would delete."""
+        return sum(
+            qs.count()
+            for _, qs in self._expired_passes(expires, policies, id_range)
+        )
+
+    def split_expired(self, expires, policies=None, parts=1):
+        """Split the ids of the expired rows into contiguous ranges.
+
+        Returns up to ``parts`` half-open ``(start, stop)`` id ranges of
+        equal width covering every expired row, to be passed as the
+        ``id_range`` of concurrent :meth:`delete_expired` calls.
+        """
+        bounds = [
+            qs.aggregate(low=Min('id'), high=Max('id'))
+            for _, qs in self._expired_passes(expires, policies)
+        ]
+        bounds = [b for b in bounds if b['low'] is not None]
+        if not bounds:
+            return []
+        low = min(b['low'] for b in bounds)
+        high = max(b['high'] for b in bounds)
+        step = -(-(high - low + 1) // max(parts, 1))
+        return [
+            (start, min(start + step, high + 1))
+            for start in range(low, high + 1, step)
+        ]
+
+    def _expired_passes(self, expires, policies, id_range=None):
+        """Return the ``(keyset field, queryset)`` pairs to delete."""
+        querysets = self.get_expired_by_policy(expires, policies)
+        if self.expires_field is None:
+            passes = [(self.expiry_field, qs) for qs in querysets]
+        else:
+            passes = [(self.expires_field, self.filter(**{
+                f'{self.expires_field}__lt': now(),
+            }))]
+            passes.extend(
+                (self.expiry_field,
+                 qs.filter(**{f'{self.expires_field}__isnull': True}))
+                for qs in querysets
+            )
+        if id_range is not None:
+            start, stop = id_range
+            passes = [
+                (field, qs.filter(id__gte=start, id__lt=stop))
+                for field, qs in passes
+            ]
+        return passes
+
+    def _delete_in(self, field, values, chunk_size=1000):
+        """Delete the rows whose ``field`` is in ``values``, by chunks.
+
+        Each chunk is a single ``DELETE ... WHERE field IN (...)``
+        statement, skipping Django's deletion collector and signals.
+        Returns the number of rows deleted.
+        """
+        using = self._write_db()
+        values = list(values)
+        deleted = 0
+        for start in range(0, len(values), chunk_size):
+            qs = self.using(using).filter(**{
+                f'{field}__in': values[start:start + chunk_size],
+            })
+            deleted += qs._raw_delete(using)
+        return deleted
+
+    def delete_batched(self, queryset, batch_size=100000):
+        """Delete the rows of ``queryset`` in batches of ``batch_size``.
+
+        The rows are deleted in id order without being loaded, each batch
+        in its own transaction.
+
+        Returns:
+            expiry_result_t: the outcome of the deletion.
+
+        """
+        return self._delete_batched(queryset.order_by(), batch_size,
+                                    field='id')
+
+    def _write_db(self):
+        # An explicit ``db_manager(alias)`` wins over the routers.
+        return self._db or router.db_for_write(self.model)
+
+    def _delete_batched(self, qs, batch_size, field=None, time_budget=None,
+                        rate=None, pause=0, lag_probe=None, max_lag=None,
+                        max_lag_wait=600, progress=None):
+        # The id breaks the ties of the keyset, unless it is the keyset.
+        keys = tuple(dict.fromkeys((field or self.expiry_field, 'id')))
+        using = self._write_db()
+        qs = qs.using(using)
+        started = monotonic()
+
+        def remaining():
+            if time_budget is None:
+                return float('inf')
+            return time_budget - (monotonic() - started)
+
+        deleted = batches = 0
+        complete = False
+        while remaining() > 0:
+            if lag_probe is not None and max_lag is not None:
+                if not self._wait_for_lag(lag_probe, max_lag, max_lag_wait,
+                                          pause, remaining):
+                    break
+            batch_started = monotonic()
+            with transaction.atomic(using=using):
+                rows, last = self._delete_batch(qs, keys, batch_size)
+            duration = monotonic() - batch_started
+            deleted += rows
+            batches += 1
+            if progress is not None:
+                progress(expiry_progress_t(
+                    batches, rows, deleted, duration,
+                    monotonic() - started,
+                ))
+            if last:
+                complete = True
                 break
-            with transaction.atomic(using=self.db):
-                self.filter(id__in=ids).delete()
+            delay = max(pause, rows / rate - duration if rate else 0)
+            if delay > 0:
+                sleep(min(delay, max(remaining(), 0)))
+        return expiry_result_t(deleted, batches, monotonic() - started,
+                               complete)
+
+    def _wait_for_lag(self, lag_probe, max_lag, max_lag_wait, pause,
+                      remaining):
+        """Sleep until ``lag_probe`` reports at most ``max_lag`` seconds.
+
+        Returns false if the probe failed, or if the lag stayed too high
+        for ``max_lag_wait`` seconds or until the time budget ran out.
+        """
+        waited = 0
+        while True:
+            try:
+                lag = lag_probe()
+            except Exception as exc:
+                logger.warning('Replication lag probe failed: %r', exc)
+                return False
+            if lag <= max_lag:
+                return True
+            delay = min(max(pause, 1), remaining(), max_lag_wait - waited)
+            if delay <= 0:
+                logger.warning(
+                    'Replication lag of %ss above %ss, stopping cleanup.',
+                    lag, max_lag,
+                )
+                return False
+            sleep(delay)
+            waited += delay
+
+    def _delete_batch(self, qs, keys, batch_size):
+        """Delete up to ``batch_size`` rows of ``qs`` in ``keys`` order.
+
+        Returns a ``(deleted, last)`` tuple, ``last`` being true once no
+        row of ``qs`` is left.
+        """
+        if connections[qs.db].vendor == 'mysql':
+            deleted = self._delete_limit(qs, keys, batch_size)
+            return deleted, deleted < batch_size
+
+        bound = qs.order_by(*keys).values_list(*keys)[
+            batch_size - 1:batch_size
+        ].first()
+        if bound is None:
+            return qs.delete()[0], True
+        if len(keys) == 1:
+            up_to_bound = Q(**{f'{keys[0]}__lte': bound[0]})
+        else:
+            value, pk = bound
+            before = Q(**{f'{keys[0]}__lt': value})
+            up_to_bound = before | Q(**{keys[0]: value, 'id__lte': pk})
+        return qs.filter(up_to_bound).delete()[0], False
+
+    def _delete_limit(self, qs, keys, batch_size):
+        connection = connections[qs.db]
+        compiler = qs.query.get_compiler(connection=connection)
+        where, params = '', []
+        if qs.query.where:
+            where, params = compiler.compile(qs.query.where)
+            where = f' WHERE {where}'
+        qn = connection.ops.quote_name
+        sql = 'DELETE FROM {table}{where} ORDER BY {order} LIMIT %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql.format(
+                table=qn(self.model._meta.db_table),
+                where=where,
+                order=', '.join(qn(key) for key in keys),
+            ), [*params, batch_size])
+            return cursor.rowcount
 
 
 class TaskResultManager(ResultManager):
     """Manager for :class:`~.models.TaskResult` models."""
 
+    expires_field = 'expires_at'
+
     _last_id = None
 
     def get_task(self, task_id):
@@ -119,13 +571,73 @@ class TaskResultManager(ResultManager):
             self._last_id = task_id
             return self.model(task_id=task_id)
 
+    def get_statuses(self, task_ids, chunk_size=1000):
+        """Return the state of the stored tasks of ``task_ids``.
+
+        The states are read with one ``task_id IN (...)`` query per chunk
+        of ``chunk_size`` ids, tasks without a stored result are left
+        out.
+
+        Returns:
+            Dict[str, str]: State by task id.
+
+        """
+        statuses = {}
+        for chunk in chunked(task_ids, chunk_size):
+            statuses.update(self.filter(task_id__in=chunk).order_by(
+            ).values_list('task_id', 'status'))
+        return statuses
+
+    def get_progress(self, task_ids, chunk_size=1000):
+        """Return the progress of the group of ``task_ids``.
+
+        The tasks are counted by state with one query per chunk of
+        ``chunk_size`` ids.
+
+        Returns:
+            group_progress_t: the progress of the group.
+
+        """
+        task_ids = set(task_ids)
+        counts = Counter()
+        for chunk in chunked(task_ids, chunk_size):
+            counts.update(dict(self.filter(task_id__in=chunk).order_by(
+            ).values_list('status').annotate(Count('id'))))
+        return group_progress(len(task_ids), counts)
+
+    def get_workflow(self, root_id):
+        """Return the results of all the tasks of the workflow ``root_id``.
+
+        The workflow of a task is the tree of tasks it called, directly or
+        not, read with one lookup on the indexed ``root_id`` column.  The
+        results are ordered by creation date.
+        """
+        return self.filter(root_id=root_id).order_by('date_created', 'id')
+
+    def get_workflow_failures(self, root_id):
+        """Return the results of the failed tasks of the workflow."""
+        return self.get_workflow(root_id).filter(status=states.FAILURE)
+
+    def get_children(self, parent_id):
+        """Return the results of the tasks called by ``parent_id``."""
+        return self.filter(parent_id=parent_id).order_by('date_created', 'id')
+
+    def get_group_tasks(self, group_id):
+        """Return the results of the tasks of ``group_id``."""
+        return self.filter(group_id=group_id).order_by('date_created', 'id')
+
+    def delete_tasks(self, task_ids, chunk_size=1000):
+        """Delete the results of ``task_ids`` in chunked bulk deletes."""
+        return self._delete_in('task_id', task_ids, chunk_size)
+
     @transaction_retry(max_retries=2)
     def store_result(self, content_type, content_encoding,
                      task_id, result, status,
                      traceback=None, meta=None,
                      periodic_task_name=None,
                      task_name=None, task_args=None, task_kwargs=None,
-                     worker=None, using=None, **kwargs):
+                     worker=None, using=None, expires_at=None,
+                     parent_id=None, root_id=None, group_id=None, **kwargs):
         """Store the result and status of a task.
 
         Arguments:
@@ -142,10 +654,15 @@ class TaskResultManager(ResultManager):
                 possible status values.
             worker (str): Worker that executes the task.
             using (str): Django database connection to use.
+            expires_at (datetime.datetime): When the result can be
+                deleted, ``None`` leaves it to the expiry horizon.
             traceback (str): The traceback string taken at the point of
                 exception (only passed if the task failed).
             meta (str): Serialized result meta data (this contains e.g.
                 children).
+            parent_id (str): Id of the task that called the task.
+            root_id (str): Id of the first task of the workflow.
+            group_id (str): Id of the group the task is part of.
 
         Keyword Arguments:
             exception_retry_count (int): How many times to retry by
@@ -165,11 +682,25 @@ class TaskResultManager(ResultManager):
             'task_name': task_name,
             'task_args': task_args,
             'task_kwargs': task_kwargs,
-            'worker': worker
+            'worker': worker,
+            'expires_at': expires_at,
+            'parent_id': parent_id,
+            'root_id': root_id,
+            'group_id': group_id,
         }
         if 'date_started' in kwargs:
             fields['date_started'] = kwargs['date_started']
 
+        table = self.model._meta.db_table
+        connection = connections[using or router.db_for_write(self.model)]
+        if is_partitioned(connection, table, cached=True):
+            # The partitioned table cannot enforce unique task ids.
+            with transaction.atomic(using=connection.alias):
+                lock_task_id(connection, table, task_id)
+                return self._store(task_id, fields, using)
+        return self._store(task_id, fields, using)
+
+    def _store(self, task_id, fields, using):
         obj, created = self.using(using).get_or_create(task_id=task_id,
                                                        defaults=fields)
         if not created:
@@ -182,6 +713,8 @@ class TaskResultManager(ResultManager):
 class GroupResultManager(ResultManager):
     """Manager for :class:`~.models.GroupResult` models."""
 
+    expires_field = 'expires_at'
+
     _last_id = None
 
     def get_group(self, group_id):
@@ -202,13 +735,85 @@ class GroupResultManager(ResultManager):
             self._last_id = group_id
             return self.model(group_id=group_id)
 
+    def delete_groups(self, group_ids, chunk_size=1000):
+        """Delete the results of ``group_ids`` in chunked bulk deletes."""
+        return self._delete_in('group_id', group_ids, chunk_size)
+
+    def count_ready_task(self, group_id, task_id, status, using=None):
+        """Count the task ``task_id`` of ``group_id`` finished with ``status``.
+
+        The member of the task is flagged as counted and the counter of
+        the group incremented in one transaction, with an ``UPDATE``
+        statement each.  The flag is only set if it was not yet, so a task
+        stored again or concurrently in a ready state is counted once.
+        Groups without counters are left alone.
+
+        Returns:
+            bool: Whether the task was counted.
+
+        """
+        field = 'succeeded' if status == states.SUCCESS else 'failed'
+        using = using or router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            if not self._members(using).filter(
+                    group_id=group_id, task_id=task_id, counted=False,
+            ).update(counted=True):
+                return False
+            return bool(self.using(using).filter(
+                group_id=group_id, total__isnull=False,
+            ).update(**{field: F(field) + 1}))
+
+    def count_ready_tasks(self, group_id, using=None):
+        """Count the tasks of ``group_id`` that finished before it was saved.
+
+        Flags the members that are not counted yet and whose task is in
+        a ready state, then adds them to the counters of the group, in one
+        transaction.  Run once the group and its members are committed,
+        a task finishing at any time is either counted here or by
+        :meth:`count_ready_task`.
+        """
+        task_results = self.model._meta.apps.get_model(
+            'django_celery_results', 'TaskResult')._default_manager
+        using = using or router.db_for_write(self.model)
+        members = self._members(using).filter(
+            group_id=group_id, counted=False)
+        ready = task_results.filter(status__in=states.READY_STATES)
+        with transaction.atomic(using=using):
+            succeeded = members.filter(task_id__in=ready.filter(
+                status=states.SUCCESS).values('task_id'),
+            ).update(counted=True)
+            failed = members.filter(task_id__in=ready.exclude(
+                status=states.SUCCESS).values('task_id'),
+            ).update(counted=True)
+            if succeeded or failed:
+                self.using(using).filter(
+                    group_id=group_id, total__isnull=False,
+                ).update(succeeded=F('succeeded') + succeeded,
+                         failed=F('failed') + failed)
+
+    def _members(self, using):
+        return self.model._meta.apps.get_model(
+            'django_celery_results', 'GroupResultMember',
+        )._default_manager.using(using)
+
     @transaction_retry(max_retries=2)
     def store_group_result(self, content_type, content_encoding,
-                           group_id, result, using=None):
+                           group_id, result, using=None, expires_at=None,
+                           counters=None):
+        """Store the result of a group.
+
+        Arguments:
+            counters (Mapping): Initial ``total``, ``succeeded`` and
+                ``failed`` counters of the group, ``None`` to not count
+                its tasks.
+
+        """
         fields = {
             'result': result,
             'content_encoding': content_encoding,
             'content_type': content_type,
+            'expires_at': expires_at,
+            **(counters or {}),
         }
 
         if not using:
@@ -221,3 +826,217 @@ class GroupResultManager(ResultManager):
                 setattr(obj, k, v)
             obj.save(using=self.db)
         return obj
+
+
+class GroupResultMemberManager(models.Manager):
+    """Manager for :class:`~.models.GroupResultMember` models."""
+
+    def store_members(self, group_id, task_ids, using=None,
+                      batch_size=1000):
+        """Record ``task_ids`` as the tasks of ``group_id``.
+
+        Replaces the tasks recorded for the group before.
+        """
+        using = using or router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            self.using(using).filter(group_id=group_id).delete()
+            self.using(using).bulk_create(
+                [self.model(group_id=group_id, task_id=task_id)
+                 for task_id in dict.fromkeys(task_ids)],
+                batch_size=batch_size, ignore_conflicts=True,
+            )
+
+    def get_progress(self, group_id):
+        """Return the progress of the recorded tasks of ``group_id``.
+
+        The tasks of the group are counted by state with a single
+        ``GROUP BY`` query, using the index of the members.
+
+        Returns:
+            group_progress_t: the progress of the group, ``None`` if its
+                tasks were not recorded.
+
+        """
+        task_results = self.model._meta.apps.get_model(
+            'django_celery_results', 'TaskResult')._default_manager
+        members = self.filter(group_id=group_id)
+        total = members.count()
+        if not total:
+            return None
+        counts = task_results.filter(
+            task_id__in=members.values('task_id'),
+        ).order_by().values_list('status').annotate(Count('id'))
+        return group_progress(total, dict(counts))
+
+    def prune(self):
+        """Delete the members of the groups that were deleted.
+
+        Returns:
+            int: Number of members deleted.
+
+        """
+        group_results = self.model._meta.apps.get_model(
+            'django_celery_results', 'GroupResult')._default_manager
+        saved = group_results.filter(group_id=OuterRef('group_id'))
+        return self.filter(~Exists(saved)).delete()[0]
+
+
+class ChordCounterManager(ResultManager):
+    """Manager for :class:`~.models.ChordCounter` models."""
+
+    # Chords running for longer than the expiry horizon keep their counter
+    # as long as header tasks keep finishing.
+    expiry_field = 'date_updated'
+
+    def get_stalled(self, threshold):
+        """Get chord counters whose count did not change for ``threshold``.
+
+        Arguments:
+            threshold (Union[int, datetime.timedelta]): Seconds (or
+                timedelta) since the counter was last decremented.
+
+        """
+        return self.filter(
+            date_updated__lt=now() - maybe_timedelta(threshold)
+        ).order_by('date_updated')
+
+
+class TaskResultRollupManager(models.Manager):
+    """Manager for :class:`~.models.TaskResultRollup` models."""
+
+    def rollup(self, until=None, window=timedelta(days=1)):
+        """Aggregate the task results of the hours not rolled up yet.
+
+        Task results in a ready state done from the hour following the
+        last rollup, or from the first result, up to the start of the
+        hour of ``until`` (default now) are counted by hour, task name,
+        state and worker, with their total and longest runtime.  The hours
+        are processed in windows of ``window``, with one grouped query
+        each, so that a first rollup does not aggregate the whole table at
+        once.
+
+        Returns:
+            int: Number of rollup rows created.
+
+        """
+        task_results = self.model._meta.apps.get_model(
+            'django_celery_results', 'TaskResult')._default_manager
+        until = (until or now()).replace(minute=0, second=0, microsecond=0)
+        results = task_results.filter(status__in=states.READY_STATES)
+        last = self.aggregate(last=Max('period'))['last']
+        if last is not None:
+            start = last + timedelta(hours=1)
+        else:
+            start = results.filter(date_done__lt=until).aggregate(
+                first=Min('date_done'))['first']
+            if start is None:
+                return 0
+            start = start.replace(minute=0, second=0, microsecond=0)
+        created = 0
+        while start < until:
+            end = min(start + window, until)
+            created += self._rollup_window(
+                results.filter(date_done__gte=start, date_done__lt=end))
+            start = end
+        return created
+
+    def _rollup_window(self, results):
+        runtime = ExpressionWrapper(F('date_done') - F('date_started'),
+                                    output_field=DurationField())
+        rows = results.annotate(
+            period=TruncHour('date_done'),
+        ).values('period', 'task_name', 'status', 'worker').annotate(
+            count=Count('id'),
+            runtime_count=Count('date_started'),
+            total_runtime=Sum(runtime),
+            max_runtime=Max(runtime),
+        ).order_by()
+        objs = [
+            self.model(
+                period=row['period'],
+                task_name=row['task_name'],
+                status=row['status'],
+                worker=row['worker'],
+                count=row['count'],
+                runtime_count=row['runtime_count'],
+                total_runtime=_seconds(row['total_runtime']) or 0,
+                max_runtime=_seconds(row['max_runtime']),
+            )
+            for row in rows
+        ]
+        if objs:
+            self.bulk_create(objs, ignore_conflicts=True)
+        return len(objs)
+
+
+class TaskResultFacetManager(models.Manager):
+    """Manager for :class:`~.models.TaskResultFacet` models."""
+
+    #: Task result fields whose distinct values are recorded.
+    fields = ('periodic_task_name', 'task_name', 'worker')
+
+    #: Seconds during which a process does not record a value again.
+    seen_timeout = 3600
+
+    def record(self, values, using=None):
+        """Record the facet values of a task result being stored.
+
+        Values recorded by this process less than :attr:`seen_timeout`
+        seconds ago are skipped, the others are inserted in a single
+        statement ignoring the values already recorded.
+
+        Arguments:
+            values (Mapping): Task result field values by field name.
+            using (str): Database to record the values in.
+
+        """
+        using = using or router.db_for_write(self.model)
+        current = monotonic()
+        keys, objs = [], []
+        for field in self.fields:
+            value = values.get(field)
+            if not value:
+                continue
+            key = (using, field, value)
+            seen = _seen_facets.get(key)
+            if seen is not None and current - seen < self.seen_timeout:
+                continue
+            keys.append(key)
+            objs.append(self.model(field=field, value=value))
+        if objs:
+            self.using(using).bulk_create(objs, ignore_conflicts=True)
+            _seen_facets.update(dict.fromkeys(keys, current))
+
+    def prune(self):
+        """Delete the facet values no task result holds anymore.
+
+        Each value is checked with an index lookup on the task result
+        table.  The values recorded by other processes are recorded again
+        once their :attr:`seen_timeout` elapsed.
+
+        Returns:
+            int: Number of facet values deleted.
+
+        """
+        task_results = self.model._meta.apps.get_model(
+            'django_celery_results', 'TaskResult')._default_manager
+        deleted = 0
+        for field in self.fields:
+            used = task_results.filter(**{field: OuterRef('value')})
+            deleted += self.filter(field=field).filter(
+                ~Exists(used)).delete()[0]
+        _seen_facets.clear()
+        return deleted
+
+    def values_for(self, field):
+        """Return the recorded values of ``field``, in order."""
+        return self.filter(field=field).order_by('value').values_list(
+            'value', flat=True)
+
+
+# Facet values recorded by this process, by database, field and value.
+_seen_facets = {}
+
+
+def _seconds(duration):
+    return None if duration is None else duration.total_seconds()
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0014_alter_taskresult_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chordcounter',
+            name='date_created',
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                help_text=(
+                    'Datetime field when the chord counter was created in UTC'
+                ),
+                verbose_name='Created DateTime',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='chordcounter',
+            name='date_updated',
+            field=models.DateTimeField(
+                auto_now=True,
+                help_text=(
+                    'Datetime field when the count was last decremented in UTC'
+                ),
+                verbose_name='Updated DateTime',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='chordcounter',
+            index=models.Index(
+                fields=['date_created'],
+                name='django_cele_date_cr_c73e00_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='chordcounter',
+            index=models.Index(
+                fields=['date_updated'],
+                name='django_cele_date_up_0651bc_idx'
+            ),
+        ),
+    ]
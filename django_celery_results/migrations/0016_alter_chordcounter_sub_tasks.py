@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            'django_celery_results',
+            '0015_chordcounter_date_created_date_updated'
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chordcounter',
+            name='sub_tasks',
+            field=models.TextField(
+                help_text='JSON serialized list of task result tuples or '
+                          'packed list of task ids. '
+                          'use .group_result() to decode'
+            ),
+        ),
+    ]
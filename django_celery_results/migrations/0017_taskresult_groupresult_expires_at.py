@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0016_alter_chordcounter_sub_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupresult',
+            name='expires_at',
+            field=models.DateTimeField(
+                default=None,
+                help_text=(
+                    'Datetime field after which the group result is deleted '
+                    'in UTC'
+                ),
+                null=True,
+                verbose_name='Expires DateTime',
+            ),
+        ),
+        migrations.AddField(
+            model_name='taskresult',
+            name='expires_at',
+            field=models.DateTimeField(
+                default=None,
+                help_text=(
+                    'Datetime field after which the task result is deleted '
+                    'in UTC'
+                ),
+                null=True,
+                verbose_name='Expires DateTime',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='groupresult',
+            index=models.Index(
+                fields=['expires_at'],
+                name='django_cele_expires_9e6cb0_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='taskresult',
+            index=models.Index(
+                fields=['expires_at'],
+                name='django_cele_expires_668996_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0017_taskresult_groupresult_expires_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskResultRollup',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID')),
+                ('period', models.DateTimeField(
+                    help_text='Start of the hour the task results were '
+                              'done in',
+                    verbose_name='Period')),
+                ('task_name', models.CharField(
+                    help_text='Name of the Task which was run',
+                    max_length=getattr(
+                        settings,
+                        'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+                        255
+                    ),
+                    null=True,
+                    verbose_name='Task Name')),
+                ('status', models.CharField(
+                    help_text='State of the task results',
+                    max_length=50,
+                    verbose_name='Task State')),
+                ('worker', models.CharField(
+                    help_text='Worker that executed the tasks',
+                    max_length=100,
+                    null=True,
+                    verbose_name='Worker')),
+                ('count', models.PositiveIntegerField(
+                    help_text='Number of task results',
+                    verbose_name='Count')),
+                ('runtime_count', models.PositiveIntegerField(
+                    help_text='Number of task results with a started '
+                              'datetime',
+                    verbose_name='Timed Count')),
+                ('total_runtime', models.FloatField(
+                    default=0,
+                    help_text='Sum of the runtimes in seconds',
+                    verbose_name='Total Runtime')),
+                ('max_runtime', models.FloatField(
+                    help_text='Longest runtime in seconds',
+                    null=True,
+                    verbose_name='Max Runtime')),
+            ],
+            options={
+                'verbose_name': 'task result rollup',
+                'verbose_name_plural': 'task result rollups',
+                'ordering': ['-period'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskresultrollup',
+            constraint=models.UniqueConstraint(
+                fields=('period', 'task_name', 'status', 'worker'),
+                name='django_celery_results_rollup_unique',
+            ),
+        ),
+    ]
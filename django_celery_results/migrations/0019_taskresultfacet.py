@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+FACET_FIELDS = ('periodic_task_name', 'task_name', 'worker')
+
+
+def backfill_facets(apps, schema_editor):
+    """Record the distinct values of the existing task results."""
+    db = schema_editor.connection.alias
+    TaskResult = apps.get_model('django_celery_results', 'TaskResult')
+    TaskResultFacet = apps.get_model(
+        'django_celery_results', 'TaskResultFacet')
+    for field in FACET_FIELDS:
+        values = TaskResult.objects.using(db).exclude(
+            **{f'{field}__isnull': True}
+        ).exclude(**{field: ''}).values_list(
+            field, flat=True).order_by().distinct()
+        TaskResultFacet.objects.using(db).bulk_create(
+            [TaskResultFacet(field=field, value=value) for value in values],
+            batch_size=1000, ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0018_taskresultrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskResultFacet',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID')),
+                ('field', models.CharField(
+                    help_text='Name of the task result field',
+                    max_length=50,
+                    verbose_name='Field')),
+                ('value', models.CharField(
+                    help_text='Value held by at least one task result',
+                    max_length=getattr(
+                        settings,
+                        'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+                        255
+                    ),
+                    verbose_name='Value')),
+            ],
+            options={
+                'verbose_name': 'task result facet',
+                'verbose_name_plural': 'task result facets',
+                'ordering': ['field', 'value'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskresultfacet',
+            constraint=models.UniqueConstraint(
+                fields=('field', 'value'),
+                name='django_celery_results_facet_unique',
+            ),
+        ),
+        migrations.RunPython(backfill_facets, migrations.RunPython.noop),
+    ]
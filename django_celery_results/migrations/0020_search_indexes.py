@@ -0,0 +1,89 @@
+import logging
+
+from django.db import DatabaseError, migrations
+
+logger = logging.getLogger(__name__)
+
+# Model, name, column and operator class of the search indexes, PostgreSQL
+# only: prefix searches need pattern operator classes under most
+# collations, searches in the arguments need trigram indexes.  The task and
+# group ids are unique, so Django already gave them a pattern index.
+SEARCH_INDEXES = (
+    ('TaskResult', 'django_cele_task_na_pattern_idx', 'task_name',
+     'varchar_pattern_ops'),
+    ('TaskResult', 'django_cele_periodi_pattern_idx', 'periodic_task_name',
+     'varchar_pattern_ops'),
+    ('TaskResult', 'django_cele_task_ar_trgm_idx', 'task_args',
+     'gin_trgm_ops'),
+    ('TaskResult', 'django_cele_task_kw_trgm_idx', 'task_kwargs',
+     'gin_trgm_ops'),
+)
+
+
+def _is_partitioned(cursor, table):
+    cursor.execute(
+        'SELECT 1 FROM pg_partitioned_table '
+        'WHERE partrelid = to_regclass(%s)', [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def create_search_indexes(apps, schema_editor):
+    """Create the search indexes, without locking out writes."""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except DatabaseError as exc:
+            trigrams = False
+            logger.warning(
+                'Cannot create the pg_trgm extension (%s), searches in the '
+                'task arguments will scan the table.', exc,
+            )
+        else:
+            trigrams = True
+        for model, name, column, opclass in SEARCH_INDEXES:
+            if opclass == 'gin_trgm_ops' and not trigrams:
+                continue
+            table = apps.get_model(
+                'django_celery_results', model)._meta.db_table
+            # Partitioned tables cannot be indexed concurrently.
+            concurrently = 'CONCURRENTLY '
+            if _is_partitioned(cursor, qn(table)):
+                concurrently = ''
+            if opclass == 'gin_trgm_ops':
+                # icontains compares UPPER(column) LIKE UPPER(term).
+                method, expression = 'gin', f'UPPER({qn(column)})'
+            else:
+                method, expression = 'btree', qn(column)
+            cursor.execute(
+                f'CREATE INDEX {concurrently}IF NOT EXISTS {qn(name)} '
+                f'ON {qn(table)} USING {method} ({expression} {opclass})'
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for _, name, _, _ in SEARCH_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {qn(name)}')
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently, which cannot run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('django_celery_results', '0019_taskresultfacet'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0020_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupResultMember',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID')),
+                ('group_id', models.CharField(
+                    help_text='Celery ID for the Group',
+                    max_length=getattr(
+                        settings,
+                        'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+                        255
+                    ),
+                    verbose_name='Group ID')),
+                ('task_id', models.CharField(
+                    help_text='Celery ID for the Task of the Group',
+                    max_length=getattr(
+                        settings,
+                        'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+                        255
+                    ),
+                    verbose_name='Task ID')),
+            ],
+            options={
+                'verbose_name': 'group result member',
+                'verbose_name_plural': 'group result members',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='groupresultmember',
+            constraint=models.UniqueConstraint(
+                fields=('group_id', 'task_id'),
+                name='django_celery_results_member_unique',
+            ),
+        ),
+    ]
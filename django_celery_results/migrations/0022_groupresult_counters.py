@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0021_groupresultmember'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupresult',
+            name='failed',
+            field=models.PositiveIntegerField(
+                default=None,
+                help_text='Number of tasks of the group that finished in '
+                          'another ready state',
+                null=True,
+                verbose_name='Failed'),
+        ),
+        migrations.AddField(
+            model_name='groupresult',
+            name='succeeded',
+            field=models.PositiveIntegerField(
+                default=None,
+                help_text='Number of tasks of the group that succeeded',
+                null=True,
+                verbose_name='Succeeded'),
+        ),
+        migrations.AddField(
+            model_name='groupresult',
+            name='total',
+            field=models.PositiveIntegerField(
+                default=None,
+                help_text='Number of tasks of the group, if counted',
+                null=True,
+                verbose_name='Total'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-19 20:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0022_groupresult_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskresult',
+            name='group_id',
+            field=models.CharField(
+                default=None,
+                help_text='Celery ID for the Group the task is part of',
+                max_length=getattr(
+                    settings,
+                    'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+                    255
+                ),
+                null=True,
+                verbose_name='Group ID'),
+        ),
+        migrations.AddField(
+            model_name='taskresult',
+            name='parent_id',
+            field=models.CharField(
+                default=None,
+                help_text='Celery ID for the Task that called the task',
+                max_length=getattr(
+                    settings,
+                    'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+                    255
+                ),
+                null=True,
+                verbose_name='Parent ID'),
+        ),
+        migrations.AddField(
+            model_name='taskresult',
+            name='root_id',
+            field=models.CharField(
+                default=None,
+                help_text='Celery ID for the first Task of the workflow',
+                max_length=getattr(
+                    settings,
+                    'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+                    255
+                ),
+                null=True,
+                verbose_name='Root ID'),
+        ),
+        migrations.AddIndex(
+            model_name='taskresult',
+            index=models.Index(
+                fields=['parent_id'],
+                name='django_cele_parent__15f2a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskresult',
+            index=models.Index(
+                fields=['root_id'],
+                name='django_cele_root_id_720f9a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskresult',
+            index=models.Index(
+                fields=['group_id'],
+                name='django_cele_group_i_935083_idx'),
+        ),
+    ]
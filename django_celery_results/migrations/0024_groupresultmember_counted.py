@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_results', '0023_taskresult_lineage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupresultmember',
+            name='counted',
+            field=models.BooleanField(
+                default=False,
+                help_text='Whether the task is counted in the counters of '
+                          'the group',
+                verbose_name='Counted'),
+        ),
+    ]
@@ -1,19 +1,67 @@
 """Database models."""
 
+import base64
+import codecs
 import json
+import zlib
 
 from celery import states
+from celery.app import app_or_default
 from celery.result import GroupResult as CeleryGroupResult
-from celery.result import result_from_tuple
+from celery.result import ResultSet, result_from_tuple
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from . import managers
+from .utils import get_setting
 
 ALL_STATES = sorted(states.ALL_STATES)
 TASK_STATE_CHOICES = sorted(zip(ALL_STATES, ALL_STATES))
 
+#: Prefix of a :attr:`ChordCounter.sub_tasks` value holding a packed list
+#: of task ids.
+SUB_TASKS_IDS = 'ids:'
+#: Prefix of a :attr:`ChordCounter.sub_tasks` value holding a zlib
+#: compressed, base64 encoded packed list of task ids.
+SUB_TASKS_ZIDS = 'zids:'
+SUB_TASKS_SEP = ','
+
+# Size of the base64 slices fed to the decompressor, must be a multiple of 4.
+_DECODE_CHUNK_SIZE = 64 * 1024
+
+# Default of the ``compress_threshold`` argument, ``None`` is a valid value.
+_USE_SETTING = object()
+
+
+def _is_packable(result):
+    if isinstance(result, ResultSet) or result.parent is not None:
+        return False
+    return SUB_TASKS_SEP not in result.id
+
+
+def _iter_packed_ids(data):
+    start = 0
+    while start < len(data):
+        end = data.find(SUB_TASKS_SEP, start)
+        if end == -1:
+            end = len(data)
+        yield data[start:end]
+        start = end + 1
+
+
+def _iter_compressed_ids(data):
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    tail = ''
+    for offset in range(0, len(data), _DECODE_CHUNK_SIZE):
+        chunk = base64.b64decode(data[offset:offset + _DECODE_CHUNK_SIZE])
+        tail += decoder.decode(decompressor.decompress(chunk))
+        *ids, tail = tail.split(SUB_TASKS_SEP)
+        yield from ids
+    tail += decoder.decode(decompressor.flush(), final=True)
+    yield from _iter_packed_ids(tail)
+
 
 class TaskResult(models.Model):
     """Task result/status."""
@@ -91,6 +139,35 @@ class TaskResult(models.Model):
         verbose_name=_('Task Meta Information'),
         help_text=_('JSON meta information about the task, '
                     'such as information on child tasks'))
+    expires_at = models.DateTimeField(
+        null=True, default=None,
+        verbose_name=_('Expires DateTime'),
+        help_text=_('Datetime field after which the task result is deleted '
+                    'in UTC'))
+    parent_id = models.CharField(
+        null=True, default=None, max_length=getattr(
+            settings,
+            'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+            255
+        ),
+        verbose_name=_('Parent ID'),
+        help_text=_('Celery ID for the Task that called the task'))
+    root_id = models.CharField(
+        null=True, default=None, max_length=getattr(
+            settings,
+            'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+            255
+        ),
+        verbose_name=_('Root ID'),
+        help_text=_('Celery ID for the first Task of the workflow'))
+    group_id = models.CharField(
+        null=True, default=None, max_length=getattr(
+            settings,
+            'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+            255
+        ),
+        verbose_name=_('Group ID'),
+        help_text=_('Celery ID for the Group the task is part of'))
 
     objects = managers.TaskResultManager()
 
@@ -116,6 +193,14 @@ class TaskResult(models.Model):
                          name='django_cele_date_do_f59aad_idx'),
             models.Index(fields=['periodic_task_name'],
                          name='django_cele_periodi_1993cf_idx'),
+            models.Index(fields=['expires_at'],
+                         name='django_cele_expires_668996_idx'),
+            models.Index(fields=['parent_id'],
+                         name='django_cele_parent__15f2a0_idx'),
+            models.Index(fields=['root_id'],
+                         name='django_cele_root_id_720f9a_idx'),
+            models.Index(fields=['group_id'],
+                         name='django_cele_group_i_935083_idx'),
         ]
 
     def as_dict(self):
@@ -150,8 +235,8 @@ class ChordCounter(models.Model):
     )
     sub_tasks = models.TextField(
         help_text=_(
-            "JSON serialized list of task result tuples. "
-            "use .group_result() to decode"
+            "JSON serialized list of task result tuples or packed list of "
+            "task ids. use .group_result() to decode"
         )
     )
     count = models.PositiveIntegerField(
@@ -160,6 +245,89 @@ class ChordCounter(models.Model):
             "finished"
         )
     )
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Created DateTime"),
+        help_text=_(
+            "Datetime field when the chord counter was created in UTC"
+        ),
+    )
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Updated DateTime"),
+        help_text=_(
+            "Datetime field when the count was last decremented in UTC"
+        ),
+    )
+
+    objects = managers.ChordCounterManager()
+
+    class Meta:
+        """Table information."""
+
+        # Explicit names to solve https://code.djangoproject.com/ticket/33483
+        indexes = [
+            models.Index(fields=['date_created'],
+                         name='django_cele_date_cr_c73e00_idx'),
+            models.Index(fields=['date_updated'],
+                         name='django_cele_date_up_0651bc_idx'),
+        ]
+
+    @staticmethod
+    def encode_sub_tasks(results, compress_threshold=_USE_SETTING):
+        """Serialize the chord header ``results`` for :attr:`sub_tasks`.
+
+        Headers made only of plain results (no parents, no nested groups)
+        are stored as a packed list of ids when the
+        ``CHORD_COMPACT_SUB_TASKS`` setting is enabled, and zlib compressed
+        once they grow past ``compress_threshold`` characters.  Any other
+        header is stored as the JSON list of result tuples.
+
+        Arguments:
+            results (List[celery.result.AsyncResult]): chord header results.
+            compress_threshold (int): Size from which packed ids are
+                compressed, ``None`` disables compression.  Defaults to the
+                ``CHORD_COMPRESS_THRESHOLD`` setting (64 KiB).
+
+        """
+        compact = get_setting('CHORD_COMPACT_SUB_TASKS', False)
+        if not (compact and all(_is_packable(r) for r in results)):
+            return json.dumps([r.as_tuple() for r in results])
+
+        data = SUB_TASKS_SEP.join(r.id for r in results)
+        if compress_threshold is _USE_SETTING:
+            compress_threshold = get_setting(
+                'CHORD_COMPRESS_THRESHOLD', 64 * 1024)
+        if compress_threshold is not None and len(data) > compress_threshold:
+            return SUB_TASKS_ZIDS + base64.b64encode(
+                zlib.compress(data.encode())).decode()
+        return SUB_TASKS_IDS + data
+
+    def iter_sub_tasks(self, app=None):
+        """Iterate over the decoded results of :attr:`sub_tasks`.
+
+        Packed ids are decoded incrementally: neither the decompressed
+        header nor the list of its ids is ever held in memory as a whole,
+        only the results yielded so far.
+
+        Arguments:
+            app (celery.app.base.Celery): app instance to create the
+               results with.
+
+        """
+        data = self.sub_tasks
+        if data.startswith(SUB_TASKS_IDS):
+            ids = _iter_packed_ids(data[len(SUB_TASKS_IDS):])
+        elif data.startswith(SUB_TASKS_ZIDS):
+            ids = _iter_compressed_ids(data[len(SUB_TASKS_ZIDS):])
+        else:
+            for r in json.loads(data):
+                yield result_from_tuple(r, app=app)
+            return
+
+        Result = app_or_default(app).AsyncResult
+        for task_id in ids:
+            yield Result(task_id)
 
     def group_result(self, app=None):
         """Return the :class:`celery.result.GroupResult` of self.
@@ -171,8 +339,7 @@ class ChordCounter(models.Model):
         """
         return CeleryGroupResult(
             self.group_id,
-            [result_from_tuple(r, app=app)
-             for r in json.loads(self.sub_tasks)],
+            list(self.iter_sub_tasks(app=app)),
             app=app
         )
 
@@ -215,6 +382,47 @@ class GroupResult(models.Model):
         verbose_name=_('Result Data'),
         help_text=_('The data returned by the task.  '
                     'Use content_encoding and content_type fields to read.'))
+    expires_at = models.DateTimeField(
+        null=True, default=None,
+        verbose_name=_("Expires DateTime"),
+        help_text=_("Datetime field after which the group result is deleted "
+                    "in UTC"),
+    )
+    total = models.PositiveIntegerField(
+        null=True, default=None,
+        verbose_name=_('Total'),
+        help_text=_('Number of tasks of the group, if counted'))
+    succeeded = models.PositiveIntegerField(
+        null=True, default=None,
+        verbose_name=_('Succeeded'),
+        help_text=_('Number of tasks of the group that succeeded'))
+    failed = models.PositiveIntegerField(
+        null=True, default=None,
+        verbose_name=_('Failed'),
+        help_text=_('Number of tasks of the group that finished in '
+                    'another ready state'))
+
+    @property
+    def has_counters(self):
+        """Whether the tasks of the group are counted as they finish."""
+        return self.total is not None
+
+    def completed_count(self):
+        """Return the number of tasks of the group that succeeded.
+
+        Like :meth:`celery.result.GroupResult.completed_count`, read from
+        the counters of the group, ``None`` if it has none.
+        """
+        return self.succeeded
+
+    def ready(self):
+        """Return whether all the tasks of the group finished.
+
+        Like :meth:`celery.result.GroupResult.ready`, read from the
+        counters of the group, ``None`` if it has none.
+        """
+        if self.has_counters:
+            return self.succeeded + self.failed >= self.total
 
     def as_dict(self):
         return {
@@ -242,4 +450,154 @@ class GroupResult(models.Model):
                          name='django_cele_date_cr_bd6c1d_idx'),
             models.Index(fields=['date_done'],
                          name='django_cele_date_do_caae0e_idx'),
+            models.Index(fields=['expires_at'],
+                         name='django_cele_expires_9e6cb0_idx'),
+        ]
+
+
+class TaskResultRollup(models.Model):
+    """Hourly aggregates of task results, kept after the results expire."""
+
+    period = models.DateTimeField(
+        verbose_name=_('Period'),
+        help_text=_('Start of the hour the task results were done in'))
+    task_name = models.CharField(
+        null=True, max_length=getattr(
+            settings,
+            'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+            255
+        ),
+        verbose_name=_('Task Name'),
+        help_text=_('Name of the Task which was run'))
+    status = models.CharField(
+        max_length=50,
+        verbose_name=_('Task State'),
+        help_text=_('State of the task results'))
+    worker = models.CharField(
+        max_length=100, null=True,
+        verbose_name=_('Worker'), help_text=_('Worker that executed the tasks')
+    )
+    count = models.PositiveIntegerField(
+        verbose_name=_('Count'),
+        help_text=_('Number of task results'))
+    runtime_count = models.PositiveIntegerField(
+        verbose_name=_('Timed Count'),
+        help_text=_('Number of task results with a started datetime'))
+    total_runtime = models.FloatField(
+        default=0,
+        verbose_name=_('Total Runtime'),
+        help_text=_('Sum of the runtimes in seconds'))
+    max_runtime = models.FloatField(
+        null=True,
+        verbose_name=_('Max Runtime'),
+        help_text=_('Longest runtime in seconds'))
+
+    objects = managers.TaskResultRollupManager()
+
+    class Meta:
+        """Table information."""
+
+        ordering = ['-period']
+
+        verbose_name = _('task result rollup')
+        verbose_name_plural = _('task result rollups')
+
+        # Its index also serves the lookups by period.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'task_name', 'status', 'worker'],
+                name='django_celery_results_rollup_unique',
+            ),
+        ]
+
+    @property
+    def average_runtime(self):
+        """Average runtime in seconds of the timed task results."""
+        if self.runtime_count:
+            return self.total_runtime / self.runtime_count
+
+    def __str__(self):
+        return '<Rollup: {0.period} {0.task_name} ({0.status})>'.format(
+            self)
+
+
+class TaskResultFacet(models.Model):
+    """Distinct value of a task result field the admin filters on."""
+
+    field = models.CharField(
+        max_length=50,
+        verbose_name=_('Field'),
+        help_text=_('Name of the task result field'))
+    value = models.CharField(
+        max_length=getattr(
+            settings,
+            'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+            255
+        ),
+        verbose_name=_('Value'),
+        help_text=_('Value held by at least one task result'))
+
+    objects = managers.TaskResultFacetManager()
+
+    class Meta:
+        """Table information."""
+
+        ordering = ['field', 'value']
+
+        verbose_name = _('task result facet')
+        verbose_name_plural = _('task result facets')
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=['field', 'value'],
+                name='django_celery_results_facet_unique',
+            ),
         ]
+
+    def __str__(self):
+        return f'<Facet: {self.field}={self.value}>'
+
+
+class GroupResultMember(models.Model):
+    """Task of a saved group, to count the progress of the group in SQL."""
+
+    group_id = models.CharField(
+        max_length=getattr(
+            settings,
+            'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+            255
+        ),
+        verbose_name=_('Group ID'),
+        help_text=_('Celery ID for the Group'))
+    task_id = models.CharField(
+        max_length=getattr(
+            settings,
+            'DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH',
+            255
+        ),
+        verbose_name=_('Task ID'),
+        help_text=_('Celery ID for the Task of the Group'))
+    counted = models.BooleanField(
+        default=False,
+        verbose_name=_('Counted'),
+        help_text=_('Whether the task is counted in the counters of '
+                    'the group'))
+
+    objects = managers.GroupResultMemberManager()
+
+    class Meta:
+        """Table information."""
+
+        verbose_name = _('group result member')
+        verbose_name_plural = _('group result members')
+
+        # Its index also serves the lookups by group.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group_id', 'task_id'],
+                name='django_celery_results_member_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f'<Member: {self.group_id} {self.task_id}>'
@@ -0,0 +1,73 @@
+"""Paginator counting large tables from the engine statistics."""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .utils import get_setting
+
+
+def estimate_count(model, using='default'):
+    """Return the estimated number of rows of the table of ``model``.
+
+    The estimate comes from the statistics the engine keeps for its query
+    planner: ``pg_class.reltuples`` on PostgreSQL, ``TABLE_ROWS`` of
+    ``information_schema.TABLES`` on MySQL.  Returns ``None`` on other
+    engines, or if the table was never analyzed.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = ('SELECT reltuples::bigint FROM pg_class '
+               'WHERE oid = to_regclass(%s)')
+        params = [connection.ops.quote_name(table)]
+    elif connection.vendor == 'mysql':
+        sql = ('SELECT TABLE_ROWS FROM information_schema.TABLES '
+               'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s')
+        params = [table]
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    # reltuples is -1 for a table never vacuumed nor analyzed.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def is_large_table(model, using='default'):
+    """Return whether the table of ``model`` is worth estimating.
+
+    That is whether its estimated number of rows reaches the
+    ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` setting.  Always ``False`` if the
+    setting is unset.
+    """
+    threshold = get_setting('ADMIN_ESTIMATED_COUNT_THRESHOLD')
+    if threshold is None:
+        return False
+    estimate = estimate_count(model, using)
+    return estimate is not None and estimate >= threshold
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the estimated row count of unfiltered large tables.
+
+    Counting every row of a table of hundreds of millions of rows takes
+    seconds, when the statistics of the engine give a close enough figure
+    for free.  The estimate is only used for querysets without any filter,
+    on tables whose estimate reaches ``ADMIN_ESTIMATED_COUNT_THRESHOLD``:
+    small tables and filtered querysets are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        query = getattr(qs, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            threshold = get_setting('ADMIN_ESTIMATED_COUNT_THRESHOLD')
+            if threshold is not None:
+                estimate = estimate_count(qs.model, qs.db)
+                if estimate is not None and estimate >= threshold:
+                    return estimate
+        return super().count
@@ -0,0 +1,347 @@
+"""Range partitioning of the task result table on PostgreSQL.
+
+The task result table can be turned into a table partitioned by
+``date_done``, one partition per day or per hour.  Expired results are
+then removed by dropping whole partitions, which costs the same whatever
+the number of rows and leaves no dead tuples behind.
+
+The partitioned table cannot enforce the uniqueness of ``task_id``, as
+unique constraints must include the partition key.  The stores of a task
+id are serialized with an advisory lock instead, see
+:func:`lock_task_id`.
+"""
+
+import re
+from datetime import timedelta
+
+from celery.utils.time import maybe_timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .utils import get_setting, now
+
+#: Width and name suffix format of the partitions, per interval.
+INTERVALS = {
+    'day': (timedelta(days=1), '%Y%m%d'),
+    'hour': (timedelta(hours=1), '%Y%m%d%H'),
+}
+
+_UPPER_BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+
+def get_interval(interval=None):
+    """Return the ``(width, suffix format)`` of the partitions.
+
+    ``interval`` defaults to the ``PARTITION_INTERVAL`` setting, itself
+    defaulting to ``'day'``.
+    """
+    interval = interval or get_setting('PARTITION_INTERVAL', 'day')
+    try:
+        return INTERVALS[interval]
+    except KeyError:
+        raise ValueError(
+            f'Unknown partition interval {interval!r}, '
+            f'use one of {", ".join(INTERVALS)}.'
+        )
+
+
+def partition_start(moment, interval=None):
+    """Return the start of the partition ``moment`` belongs to."""
+    width, _ = get_interval(interval)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if width >= timedelta(days=1):
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def partition_ranges(start, count, interval=None):
+    """Yield the ``(suffix, lower, upper)`` of ``count`` partitions."""
+    width, suffix = get_interval(interval)
+    lower = partition_start(start, interval)
+    for _ in range(count):
+        yield lower.strftime(suffix), lower, lower + width
+        lower += width
+
+
+# Tables known to be partitioned, by database alias and table name.
+_partitioned = {}
+
+
+def is_partitioned(connection, table, cached=False):
+    """Return whether ``table`` is a partitioned PostgreSQL table.
+
+    With ``cached``, the answer is looked up once per process.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    key = (connection.alias, table)
+    if cached and key in _partitioned:
+        return _partitioned[key]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = to_regclass(%s)',
+            [connection.ops.quote_name(table)],
+        )
+        _partitioned[key] = cursor.fetchone() is not None
+    return _partitioned[key]
+
+
+def lock_task_id(connection, table, task_id):
+    """Serialize the stores of ``task_id`` into the partitioned ``table``.
+
+    Takes an advisory lock held until the end of the current transaction,
+    so that concurrent stores of a task id cannot both insert it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(hashtext(%s), hashtext(%s))',
+            [table, task_id],
+        )
+
+
+def get_partitions(connection, table):
+    """Return the ``(name, upper bound)`` of the partitions of ``table``.
+
+    The upper bound is ``None`` for the default partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+            'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname',
+            [connection.ops.quote_name(table)],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _UPPER_BOUND_RE.search(bound)
+        upper = parse_datetime(match.group(1)) if match else None
+        if upper is not None and not getattr(settings, 'USE_TZ', False):
+            upper = timezone.make_naive(upper)
+        partitions.append((name, upper))
+    return partitions
+
+
+def _column_sql(connection, field, next_id):
+    qn = connection.ops.quote_name
+    if field.primary_key:
+        db_type = 'integer'
+        if field.get_internal_type() == 'BigAutoField':
+            db_type = 'bigint'
+        return (f'{qn(field.column)} {db_type} NOT NULL GENERATED BY '
+                f'DEFAULT AS IDENTITY (START WITH {int(next_id)})')
+    null = '' if field.null else ' NOT NULL'
+    return f'{qn(field.column)} {field.db_type(connection)}{null}'
+
+
+def _primary_key_name(cursor, table):
+    cursor.execute(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+        [table],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def setup_partitioning(connection, model, interval=None):
+    """Turn the table of ``model`` into a table partitioned by date_done.
+
+    The current table is kept, as the partition holding every row done
+    before the end of the current interval, and a default partition
+    catches rows no other partition covers.  The indexes of the model are
+    created on the partitioned table under their names, the matching
+    indexes of the current table are renamed with a ``_legacy`` suffix
+    and reused.
+
+    This locks the table while the current rows are checked against the
+    partition bound: run it during a maintenance window.
+    """
+    table = model._meta.db_table
+    qn = connection.ops.quote_name
+    width, _ = get_interval(interval)
+    cutoff = partition_start(now(), interval) + width
+    legacy = f'{table}_legacy'
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {qn(table)}')
+        next_id = cursor.fetchone()[0]
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        # Ids now come from the partitioned table, whether the column was
+        # an identity (Django >= 4.1) or a serial.
+        cursor.execute(
+            f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP IDENTITY '
+            f'IF EXISTS')
+        cursor.execute(
+            f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP DEFAULT')
+        # The primary key of the partitioned table includes date_done, the
+        # partition gets it when attached.
+        pkey = _primary_key_name(cursor, qn(legacy))
+        if pkey is not None:
+            cursor.execute(
+                f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(pkey)}')
+        for index in model._meta.indexes:
+            cursor.execute(
+                f'ALTER INDEX IF EXISTS {qn(index.name)} '
+                f'RENAME TO {qn(index.name + "_legacy")}')
+        columns = ', '.join(
+            _column_sql(connection, field, next_id)
+            for field in model._meta.local_concrete_fields
+        )
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} ({columns}, '
+            f'PRIMARY KEY (id, date_done)) PARTITION BY RANGE (date_done)'
+        )
+        indexes = [(index.name, index.fields, '')
+                   for index in model._meta.indexes]
+        # Replaces the unique and pattern indexes of the task id: the
+        # pattern operator class also answers equality lookups.
+        indexes.append(
+            (f'{table}_task_id_part_idx', ['task_id'], ' varchar_pattern_ops'))
+        for name, fields, opclass in indexes:
+            cursor.execute('CREATE INDEX {} ON {} ({}{})'.format(
+                qn(name),
+                qn(table),
+                ', '.join(qn(model._meta.get_field(f).column)
+                          for f in fields),
+                opclass,
+            ))
+        # With this constraint attaching the partition needs no scan.
+        cursor.execute(
+            f'ALTER TABLE {qn(legacy)} ADD CONSTRAINT '
+            f'{qn(legacy + "_bound")} '
+            f'CHECK (date_done IS NOT NULL AND date_done < %s)',
+            [cutoff],
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} '
+            f'FOR VALUES FROM (MINVALUE) TO (%s)',
+            [cutoff],
+        )
+        cursor.execute(
+            f'CREATE TABLE {qn(table + "_default")} '
+            f'PARTITION OF {qn(table)} DEFAULT'
+        )
+    _partitioned[(connection.alias, table)] = True
+
+
+def _create_partition(cursor, qn, table, name, lower, upper, default):
+    """Create the partition ``name`` of ``table`` for ``[lower, upper)``.
+
+    Rows of the ``default`` partition in that range are moved to the new
+    partition first, attaching it would fail otherwise.
+    """
+    bounds = [lower, upper]
+    if default is not None:
+        # Keep new rows out of the default partition while moving them.
+        cursor.execute(f'LOCK TABLE {qn(default)} IN EXCLUSIVE MODE')
+        cursor.execute(
+            f'SELECT 1 FROM {qn(default)} '
+            f'WHERE date_done >= %s AND date_done < %s LIMIT 1',
+            bounds,
+        )
+        if cursor.fetchone() is not None:
+            cursor.execute(
+                f'CREATE TABLE {qn(name)} (LIKE {qn(table)} '
+                f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {qn(default)} '
+                f'WHERE date_done >= %s AND date_done < %s RETURNING *) '
+                f'INSERT INTO {qn(name)} SELECT * FROM moved',
+                bounds,
+            )
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                bounds,
+            )
+            return
+    cursor.execute(
+        f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        bounds,
+    )
+
+
+def create_partitions(connection, model, count, interval=None, start=None):
+    """Create the partitions of the ``count`` intervals from ``start``.
+
+    ``start`` defaults to now.  Existing partitions are kept, and a new
+    partition starts where an overlapping one ends.  Rows of the default
+    partition falling in a new partition are moved into it.  Returns the
+    names of the partitions created.
+    """
+    table = model._meta.db_table
+    qn = connection.ops.quote_name
+    existing = get_partitions(connection, table)
+    names = {name for name, _ in existing}
+    default = next((name for name, upper in existing if upper is None),
+                   None)
+    covered = max((upper for _, upper in existing if upper is not None),
+                  default=None)
+    created = []
+    ranges = partition_ranges(start or now(), count, interval)
+    for suffix, lower, upper in ranges:
+        name = f'{table}_p{suffix}'
+        if name in names or (covered is not None and upper <= covered):
+            continue
+        if covered is not None:
+            lower = max(lower, covered)
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            _create_partition(
+                cursor, qn, table, name, lower, upper, default)
+        created.append(name)
+    return created
+
+
+def get_partition_cutoff(expires, policies=None):
+    """Return the date before which whole partitions can be dropped.
+
+    This is the longest of ``expires`` and of the retention policies
+    horizons, ``None`` if any of them keeps results forever.
+    """
+    horizons = [expires]
+    horizons.extend(policy['expires'] for policy in policies or ())
+    if any(horizon is None for horizon in horizons):
+        return None
+    return now() - max(maybe_timedelta(horizon) for horizon in horizons)
+
+
+def drop_expired_partitions(connection, model, expires, policies=None,
+                            detach_only=False):
+    """Drop the partitions of ``model`` holding only expired results.
+
+    A partition is dropped once its upper bound is older than the
+    :func:`get_partition_cutoff`, unless one of its rows has an
+    ``expires_at`` deadline still to come.  With ``detach_only`` the
+    partitions are detached from the table but kept.  Returns the names
+    of the partitions dropped or detached.
+    """
+    cutoff = get_partition_cutoff(expires, policies)
+    if cutoff is None:
+        return []
+    table = model._meta.db_table
+    qn = connection.ops.quote_name
+    dropped = []
+    for name, upper in get_partitions(connection, table):
+        if upper is None or upper > cutoff:
+            continue
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT 1 FROM {qn(name)} WHERE expires_at >= %s LIMIT 1',
+                [now()],
+            )
+            if cursor.fetchone() is not None:
+                continue
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+            if not detach_only:
+                cursor.execute(f'DROP TABLE {qn(name)}')
+        dropped.append(name)
+    return dropped
@@ -0,0 +1,137 @@
+"""Shared polling of task states for the waiting views.
+
+Each event loop has one :class:`StatusPoller`, which reads the states of
+the tasks every subscriber waits for with a single batch of queries per
+tick, however many requests are waiting.
+"""
+
+import asyncio
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from celery import states
+
+from .models import TaskResult
+from .utils import get_setting
+
+logger = logging.getLogger(__name__)
+
+_pollers = weakref.WeakKeyDictionary()
+
+
+def get_poller():
+    """Return the poller of the running event loop."""
+    loop = asyncio.get_running_loop()
+    poller = _pollers.get(loop)
+    if poller is None:
+        poller = _pollers[loop] = StatusPoller(
+            get_setting('STATUS_POLL_INTERVAL', 1.0))
+    return poller
+
+
+class Subscription:
+    """The tasks a waiting request follows.
+
+    Use it as a context manager to stop following them.
+    """
+
+    def __init__(self, poller, task_ids):
+        self.poller = poller
+        self.task_ids = frozenset(task_ids)
+        #: Last known state by task id, ``PENDING`` for unknown tasks.
+        self.statuses = {}
+        self._changes = {}
+        self._changed = asyncio.Event()
+        self._loaded = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.poller.unsubscribe(self)
+
+    def update(self, statuses):
+        """Record the states read by the poller."""
+        for task_id in self.task_ids:
+            status = statuses.get(task_id, states.PENDING)
+            if self.statuses.get(task_id) != status:
+                self.statuses[task_id] = status
+                self._changes[task_id] = status
+        if self._changes:
+            self._changed.set()
+
+    async def load(self):
+        """Read the current states of the tasks, without waiting a tick."""
+        statuses = await sync_to_async(TaskResult.objects.get_statuses)(
+            self.task_ids, get_setting('BULK_CHUNK_SIZE', 1000))
+        self.update(statuses)
+
+    async def wait(self, timeout=None):
+        """Return the state changes since the last call.
+
+        Waits up to ``timeout`` seconds for a change, returns an empty
+        dict if none happened.  The first call reads and returns the
+        initial state of every task, whatever the timeout.
+        """
+        if not self._loaded:
+            self._loaded = True
+            await self.load()
+        if not self._changed.is_set():
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return {}
+        changes, self._changes = self._changes, {}
+        self._changed.clear()
+        return changes
+
+
+class StatusPoller:
+    """Poll the states of the tasks of all subscriptions together.
+
+    Polling runs while there are subscriptions, every ``interval``
+    seconds, with one ``task_id IN (...)`` query per chunk of
+    ``BULK_CHUNK_SIZE`` ids.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._subscriptions = set()
+        self._task = None
+
+    def subscribe(self, task_ids):
+        """Follow the states of ``task_ids``.
+
+        Returns:
+            Subscription: the subscription, reading the initial states
+                on its first wait and notified of every change afterwards.
+
+        """
+        subscription = Subscription(self, task_ids)
+        self._subscriptions.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop following the tasks of ``subscription``."""
+        self._subscriptions.discard(subscription)
+
+    async def poll(self):
+        """Read the states of the followed tasks and notify subscribers."""
+        task_ids = set()
+        for subscription in self._subscriptions:
+            task_ids |= subscription.task_ids
+        statuses = await sync_to_async(TaskResult.objects.get_statuses)(
+            task_ids, get_setting('BULK_CHUNK_SIZE', 1000))
+        for subscription in list(self._subscriptions):
+            subscription.update(statuses)
+
+    async def _run(self):
+        while self._subscriptions:
+            try:
+                await self.poll()
+            except Exception as exc:
+                logger.warning('Polling task states failed: %r', exc)
+            await asyncio.sleep(self.interval)
@@ -4,13 +4,29 @@
     URL to :func:`~celery.views.is_successful`.
 * ``/$task_id/status/``
     URL  to :func:`~celery.views.task_status`.
+* ``/group/progress/$group_id/``
+    URL to :func:`~django_celery_results.views.group_progress`.
+* ``/tasks/status/?ids=$task_id,$task_id``
+    URL to :func:`~django_celery_results.views.tasks_status`.
+* ``/tasks/wait/?ids=$task_id&groups=$group_id``
+    URL to :func:`~django_celery_results.views.wait_status`.
+* ``/tasks/events/?ids=$task_id&groups=$group_id``
+    URL to :func:`~django_celery_results.views.stream_status`.
+
+With the ``ASYNC_VIEWS`` setting, the done and status URLs are served by
+the asynchronous versions of their views, e.g.
+:func:`~django_celery_results.views.task_status_async`, which needs Django
+4.1 or later.
 """
 import warnings
 
+import django
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import path, register_converter
 
 from . import views
+from .utils import get_setting
 
 
 class TaskPatternConverter:
@@ -32,27 +48,61 @@ class TaskPatternConverter:
 
 register_converter(TaskPatternConverter, 'task_pattern')
 
+if get_setting('ASYNC_VIEWS', False):
+    if django.VERSION < (4, 1):
+        raise ImproperlyConfigured(
+            'The ASYNC_VIEWS setting needs Django 4.1 or later.')
+    is_task_successful = views.is_task_successful_async
+    task_status = views.task_status_async
+    is_group_successful = views.is_group_successful_async
+    group_status = views.group_status_async
+else:
+    is_task_successful = views.is_task_successful
+    task_status = views.task_status
+    is_group_successful = views.is_group_successful
+    group_status = views.group_status
+
 urlpatterns = [
+    path(
+        'tasks/status/',
+        views.tasks_status,
+        name='celery-tasks_status'
+    ),
+    path(
+        'tasks/wait/',
+        views.wait_status,
+        name='celery-wait_status'
+    ),
+    path(
+        'tasks/events/',
+        views.stream_status,
+        name='celery-stream_status'
+    ),
     path(
         'task/done/<task_pattern:task_id>/',
-        views.is_task_successful,
+        is_task_successful,
         name='celery-is_task_successful'
     ),
     path(
         'task/status/<task_pattern:task_id>/',
-        views.task_status,
+        task_status,
         name='celery-task_status'
     ),
     path(
         'group/done/<task_pattern:group_id>/',
-        views.is_group_successful,
+        is_group_successful,
         name='celery-is_group_successful'
     ),
     path(
         'group/status/<task_pattern:group_id>/',
-        views.group_status,
+        group_status,
         name='celery-group_status'
     ),
+    path(
+        'group/progress/<task_pattern:group_id>/',
+        views.group_progress,
+        name='celery-group_progress'
+    ),
 ]
 
 if getattr(settings, 'DJANGO_CELERY_RESULTS_ID_FIRST_URLS', True):
@@ -65,22 +115,22 @@ if getattr(settings, 'DJANGO_CELERY_RESULTS_ID_FIRST_URLS', True):
     urlpatterns += [
         path(
             '<task_pattern:task_id>/done/',
-            views.is_task_successful,
+            is_task_successful,
             name='celery-is_task_successful'
         ),
         path(
             '<task_pattern:task_id>/status/',
-            views.task_status,
+            task_status,
             name='celery-task_status'
         ),
         path(
             '<task_pattern:group_id>/group/done/',
-            views.is_group_successful,
+            is_group_successful,
             name='celery-is_group_successful'
         ),
         path(
             '<task_pattern:group_id>/group/status/',
-            views.group_status,
+            group_status,
             name='celery-group_status'
         ),
     ]
@@ -2,6 +2,8 @@
 # -- XXX This module must not use translation as that causes
 # -- a recursive loader import!
 
+from itertools import islice
+
 from django.conf import settings
 from django.utils import timezone
 
@@ -15,3 +17,21 @@ def now():
         return now_localtime(timezone.now())
     else:
         return timezone.now()
+
+
+def get_setting(name, default=None):
+    """Return ``name`` from the ``DJANGO_CELERY_RESULTS`` settings dict."""
+    try:
+        return settings.DJANGO_CELERY_RESULTS[name]
+    except (AttributeError, KeyError):
+        return default
+
+
+def chunked(iterable, size):
+    """Yield the items of ``iterable`` in lists of at most ``size``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
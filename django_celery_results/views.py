@@ -1,10 +1,163 @@
 """Views."""
-from celery import states
-from celery.result import AsyncResult, GroupResult
+import asyncio
+import json
+from collections import Counter
+
+import django
+from asgiref.sync import sync_to_async
+from celery import current_app, states
+from celery.result import AsyncResult, GroupResult, result_from_tuple
 from celery.utils import get_full_cls_name
-from django.http import JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q
+from django.http import (
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 from kombu.utils.encoding import safe_repr
 
+from . import managers
+from .backends import DatabaseBackend
+from .models import GroupResult as GroupResultModel
+from .models import TaskResult
+from .poller import get_poller
+from .utils import chunked, get_setting
+
+#: Cache-Control directives of the responses about finished tasks.
+DEFAULT_STATUS_CACHE_CONTROL = {'private': True, 'max_age': 86400}
+
+_json_encoder = DjangoJSONEncoder()
+
+
+class Validators:
+    """HTTP validators of a status response.
+
+    Arguments:
+        tag (str): Changes whenever the response would.
+        last_modified (datetime.datetime): Last change, if known.
+        ready (bool): Whether the response can no longer change.
+
+    """
+
+    def __init__(self, tag, last_modified=None, ready=False):
+        self.etag = quote_etag(tag)
+        self.last_modified = last_modified
+        self.ready = ready
+
+    def get_not_modified(self, request):
+        """Return a 304 response if the client is up to date."""
+        last_modified = None
+        if self.last_modified is not None:
+            last_modified = int(self.last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=last_modified)
+        if response is not None:
+            self.patch(response)
+        return response
+
+    def patch(self, response):
+        """Add the validators and caching headers to ``response``."""
+        response.headers['ETag'] = self.etag
+        if self.last_modified is not None:
+            response.headers['Last-Modified'] = http_date(
+                self.last_modified.timestamp())
+        if self.ready:
+            patch_cache_control(response, **get_setting(
+                'STATUS_CACHE_CONTROL', DEFAULT_STATUS_CACHE_CONTROL))
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+def _stores_in_database():
+    # Validators are read from the tables, which only hold the results
+    # stored by the database backend.
+    return isinstance(current_app.backend, DatabaseBackend)
+
+
+def _uses_async_orm():
+    # The asynchronous ORM appeared in Django 4.1.
+    return django.VERSION >= (4, 1) and _stores_in_database()
+
+
+def _task_state(task_id):
+    return TaskResult.objects.filter(task_id=task_id).values_list(
+        'status', 'date_done')
+
+
+def _task_validators(row):
+    status, date_done = row or (states.PENDING, None)
+    tag = status
+    if date_done is not None:
+        tag = f'{status}-{date_done.timestamp()}'
+    return Validators(tag, date_done, status in states.READY_STATES)
+
+
+def get_task_validators(task_id):
+    """Return the validators of the status of ``task_id``.
+
+    Only the state and completion date of the task are queried.
+    """
+    return _task_validators(_task_state(task_id).first())
+
+
+async def aget_task_validators(task_id):
+    """Asynchronous version of :func:`get_task_validators`."""
+    return _task_validators(await _task_state(task_id).afirst())
+
+
+def _group_stats(task_ids):
+    """Yield the querysets counting a group of ``task_ids``, by chunk."""
+    for chunk in chunked(task_ids, get_setting('BULK_CHUNK_SIZE', 1000)):
+        yield TaskResult.objects.filter(task_id__in=chunk), {
+            'count': Count('id'),
+            'ready': Count('id', filter=Q(status__in=states.READY_STATES)),
+            'last': Max('date_done'),
+        }
+
+
+def _group_validators(task_ids, chunk_stats):
+    count = ready = 0
+    last = None
+    for stats in chunk_stats:
+        count += stats['count']
+        ready += stats['ready']
+        if stats['last'] is not None and (
+                last is None or stats['last'] > last):
+            last = stats['last']
+    tag = f'{len(task_ids)}-{count}-{ready}'
+    if last is not None:
+        tag = f'{tag}-{last.timestamp()}'
+    return Validators(tag, last, ready == len(task_ids))
+
+
+def get_group_validators(task_ids):
+    """Return the validators of the status of a group of ``task_ids``.
+
+    They are derived from the number of tasks of ``task_ids`` stored and
+    finished, and from their last completion date, counted with one query
+    per chunk of ``BULK_CHUNK_SIZE`` ids.
+    """
+    task_ids = set(task_ids)
+    return _group_validators(task_ids, [
+        queryset.aggregate(**aggregates)
+        for queryset, aggregates in _group_stats(task_ids)
+    ])
+
+
+async def aget_group_validators(task_ids):
+    """Asynchronous version of :func:`get_group_validators`."""
+    task_ids = set(task_ids)
+    return _group_validators(task_ids, [
+        await queryset.aaggregate(**aggregates)
+        for queryset, aggregates in _group_stats(task_ids)
+    ])
+
 
 def is_task_successful(request, task_id):
     """Return task execution status in JSON format."""
@@ -15,20 +168,220 @@ def is_task_successful(request, task_id):
 
 
 def task_status(request, task_id):
-    """Return task status and result in JSON format."""
+    """Return task status and result in JSON format.
+
+    The response carries an ``ETag`` and a ``Last-Modified`` date, so
+    that polls of an unchanged task are answered with a ``304`` after
+    querying its state only.  Finished tasks are cacheable for the
+    ``STATUS_CACHE_CONTROL`` directives.
+    """
+    validators = None
+    if _stores_in_database():
+        validators = get_task_validators(task_id)
+        not_modified = validators.get_not_modified(request)
+        if not_modified is not None:
+            return not_modified
     result = AsyncResult(task_id)
-    state, retval = result.state, result.result
+    response = JsonResponse({'task': _task_data(
+        task_id, result.state, result.result, result.traceback)})
+    if validators is not None:
+        validators.patch(response)
+    return response
+
+
+def _task_data(task_id, state, retval, traceback):
     response_data = {'id': task_id, 'status': state, 'result': retval}
     if state in states.EXCEPTION_STATES:
-        traceback = result.traceback
         response_data.update({'result': safe_repr(retval),
                               'exc': get_full_cls_name(retval.__class__),
                               'traceback': traceback})
-    return JsonResponse({'task': response_data})
+    return response_data
+
+
+def _get_ids(request, name='ids'):
+    """Return the ids a batch request asks for, in order.
+
+    Ids come from the ``name`` parameters of the query string or of a
+    form, each holding one or more comma-separated ids, or from the
+    ``name`` list of a JSON body.
+    """
+    if request.method == 'POST' and request.content_type == 'application/json':
+        try:
+            values = json.loads(request.body)[name]
+        except (ValueError, TypeError, KeyError):
+            raise ValueError(f'Expected a JSON object with a list of {name}.')
+        if not isinstance(values, list) or not all(
+                isinstance(value, str) for value in values):
+            raise ValueError(f'Expected a JSON object with a list of {name}.')
+    else:
+        params = request.POST if request.method == 'POST' else request.GET
+        values = [
+            item for value in params.getlist(name)
+            for item in value.split(',')
+        ]
+    return list(dict.fromkeys(
+        value.strip() for value in values if value.strip()))
+
+
+def _check_max_ids(count):
+    max_ids = get_setting('STATUS_BATCH_MAX_IDS', 1000)
+    if count > max_ids:
+        raise ValueError(f'At most {max_ids} ids are accepted per request.')
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def tasks_status(request):
+    """Return the status of many tasks in JSON format.
+
+    The tasks are looked up with a few ``IN`` queries, tasks without a
+    stored result are reported as ``PENDING``.  At most
+    ``STATUS_BATCH_MAX_IDS`` ids are accepted per request.
+    """
+    try:
+        task_ids = _get_ids(request)
+        _check_max_ids(len(task_ids))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    statuses = TaskResult.objects.get_statuses(
+        task_ids, get_setting('BULK_CHUNK_SIZE', 1000))
+    return JsonResponse({'tasks': {
+        task_id: statuses.get(task_id, states.PENDING)
+        for task_id in task_ids
+    }})
+
+
+def _decode_result(obj):
+    """Return the decoded result of the task result ``obj``."""
+    backend = current_app.backend
+    result = backend.decode_content(obj, obj.result)
+    if obj.status in states.EXCEPTION_STATES:
+        result = backend.exception_to_python(result)
+    return result
+
+
+def _executed_entry(task_id, obj):
+    executed = obj is not None and obj.status == states.SUCCESS
+    return {'id': task_id, 'executed': executed}
+
+
+def _status_entry(task_id, obj):
+    if obj is None:
+        return {'result': None, 'status': states.PENDING}
+    result = _decode_result(obj)
+    if obj.status in states.EXCEPTION_STATES:
+        result = safe_repr(result)
+    return {'result': result, 'status': obj.status}
+
+
+#: Task result fields read by the views, for each kind of group entry.
+_ENTRY_FIELDS = {
+    _executed_entry: ('status',),
+    _status_entry: ('status', 'result', 'content_type', 'content_encoding'),
+}
+
+
+def _task_result_chunks(task_ids, entry):
+    """Yield the chunks of ``task_ids`` with the queryset of their results.
+
+    Chunks hold ``BULK_CHUNK_SIZE`` ids, and only the fields needed by
+    ``entry`` are loaded.
+    """
+    for chunk in chunked(task_ids, get_setting('BULK_CHUNK_SIZE', 1000)):
+        yield chunk, TaskResult.objects.filter(task_id__in=chunk).only(
+            'task_id', *_ENTRY_FIELDS[entry]).order_by()
+
+
+def _group_batches(task_ids, entry):
+    """Yield the ``entry`` of each of ``task_ids``, by chunk.
+
+    Each chunk of tasks is read with one query.
+    """
+    for chunk, queryset in _task_result_chunks(task_ids, entry):
+        objs = {obj.task_id: obj for obj in queryset}
+        yield [entry(task_id, objs.get(task_id)) for task_id in chunk]
+
+
+async def _agroup_batches(task_ids, entry):
+    """Asynchronous version of :func:`_group_batches`."""
+    for chunk, queryset in _task_result_chunks(task_ids, entry):
+        objs = {obj.task_id: obj async for obj in queryset}
+        yield [entry(task_id, objs.get(task_id)) for task_id in chunk]
+
+
+def _streams_group(task_ids):
+    return len(task_ids) > get_setting('STATUS_STREAM_GROUP_SIZE', 1000)
+
+
+def _group_json(group_id, results):
+    return JsonResponse({'group': {'id': group_id, 'results': results}})
+
+
+def _encode_batch(batch, first):
+    encoded = ', '.join(_json_encoder.encode(entry) for entry in batch)
+    return encoded if first else f', {encoded}'
+
+
+def _encode_group(group_id, batches):
+    """Yield the JSON document of a group response, one batch at a time."""
+    yield f'{{"group": {{"id": {_json_encoder.encode(group_id)}, "results": ['
+    first = True
+    for batch in batches:
+        if batch:
+            yield _encode_batch(batch, first)
+            first = False
+    yield ']}}'
+
+
+async def _aencode_group(group_id, batches):
+    """Asynchronous version of :func:`_encode_group`."""
+    yield f'{{"group": {{"id": {_json_encoder.encode(group_id)}, "results": ['
+    first = True
+    async for batch in batches:
+        if batch:
+            yield _encode_batch(batch, first)
+            first = False
+    yield ']}}'
+
+
+def _group_response(group_id, task_ids, entry):
+    """Return the response listing the ``entry`` of each task of a group.
+
+    The response of groups of more than ``STATUS_STREAM_GROUP_SIZE`` tasks
+    is streamed, reading their results a chunk at a time.
+    """
+    batches = _group_batches(task_ids, entry)
+    if _streams_group(task_ids):
+        return StreamingHttpResponse(
+            _encode_group(group_id, batches),
+            content_type='application/json',
+        )
+    return _group_json(
+        group_id, [item for batch in batches for item in batch])
+
+
+async def _agroup_response(group_id, task_ids, entry):
+    """Asynchronous version of :func:`_group_response`."""
+    batches = _agroup_batches(task_ids, entry)
+    # Streaming from an asynchronous iterator needs Django 4.2.
+    if django.VERSION >= (4, 2) and _streams_group(task_ids):
+        return StreamingHttpResponse(
+            _aencode_group(group_id, batches),
+            content_type='application/json',
+        )
+    return _group_json(
+        group_id, [item async for batch in batches for item in batch])
 
 
 def is_group_successful(request, group_id):
-    """Return if group was successfull as boolean."""
+    """Return if group was successfull as boolean.
+
+    With the database backend, the states of the tasks of the group are
+    read with one query per chunk of ``BULK_CHUNK_SIZE`` tasks.
+    """
+    if _stores_in_database():
+        return _group_response(
+            group_id, get_group_task_ids(group_id) or [], _executed_entry)
     results = GroupResult.restore(group_id)
 
     return JsonResponse({
@@ -43,7 +396,21 @@ def is_group_successful(request, group_id):
 
 
 def group_status(request, group_id):
-    """Return group id and its async results status & result in JSON format."""
+    """Return group id and its async results status & result in JSON format.
+
+    Like :func:`task_status`, the response carries validators and is
+    cacheable once every task of the group finished.  With the database
+    backend, the tasks of the group are read with one query per chunk of
+    ``BULK_CHUNK_SIZE`` tasks.
+    """
+    if _stores_in_database():
+        task_ids = get_group_task_ids(group_id) or []
+        validators = get_group_validators(task_ids)
+        not_modified = validators.get_not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return validators.patch(
+            _group_response(group_id, task_ids, _status_entry))
     result = GroupResult.restore(group_id)
     retval = [
         {"result": async_result.result, "status": async_result.status}
@@ -51,3 +418,255 @@ def group_status(request, group_id):
     ]
     response_data = {'id': group_id, 'results': retval}
     return JsonResponse({'group': response_data})
+
+
+def group_progress(request, group_id):
+    """Return the number of tasks of a group by state in JSON format.
+
+    The response also tells the number of tasks, of finished and failed
+    tasks, and whether all of them finished.  With the database backend
+    they are counted in SQL, see
+    :meth:`~django_celery_results.backends.DatabaseBackend.group_progress`.
+    """
+    if _stores_in_database():
+        progress = current_app.backend.group_progress(group_id)
+    else:
+        result = GroupResult.restore(group_id)
+        progress = None if result is None else managers.group_progress(
+            len(result.results),
+            Counter(async_result.state for async_result in result.results),
+        )
+    if progress is None:
+        return JsonResponse(
+            {'error': f'Unknown group {group_id}.'}, status=404)
+    return JsonResponse({'group': {'id': group_id, **progress._asdict()}})
+
+
+def get_group_task_ids(group_id):
+    """Return the ids of the tasks of ``group_id``, ``None`` if unknown."""
+    result = GroupResult.restore(group_id)
+    if result is None:
+        return None
+    return [async_result.id for async_result in result.results]
+
+
+def _get_wait_request(request):
+    """Return the task ids, group members and timeout of a wait request.
+
+    Group members are resolved in the calling thread, the timeout is
+    capped to ``STATUS_WAIT_TIMEOUT`` seconds.
+    """
+    task_ids = _get_ids(request)
+    group_ids = _get_ids(request, 'groups')
+    if not task_ids and not group_ids:
+        raise ValueError('No task or group ids given.')
+    _check_max_ids(len(task_ids) + len(group_ids))
+    groups = {}
+    for group_id in group_ids:
+        members = get_group_task_ids(group_id)
+        if members is None:
+            raise LookupError(f'Unknown group {group_id}.')
+        groups[group_id] = members
+    max_timeout = get_setting('STATUS_WAIT_TIMEOUT', 30)
+    try:
+        timeout = float(request.GET.get('timeout', max_timeout))
+    except ValueError:
+        raise ValueError('The timeout must be a number of seconds.')
+    return task_ids, groups, max(min(timeout, max_timeout), 0)
+
+
+def _group_progress(statuses, members):
+    completed = sum(
+        statuses.get(task_id) in states.READY_STATES for task_id in members)
+    return {'completed': completed, 'total': len(members)}
+
+
+def _status_map(statuses, task_ids, groups):
+    data = {'tasks': {
+        task_id: statuses.get(task_id, states.PENDING) for task_id in task_ids
+    }}
+    if groups:
+        data['groups'] = {
+            group_id: _group_progress(statuses, members)
+            for group_id, members in groups.items()
+        }
+    return data
+
+
+def _any_completed(statuses, task_ids, groups):
+    if any(statuses.get(task_id) in states.READY_STATES
+           for task_id in task_ids):
+        return True
+    return any(
+        all(statuses.get(task_id) in states.READY_STATES
+            for task_id in members)
+        for members in groups.values()
+    )
+
+
+async def _parse_wait_request(request):
+    if request.method != 'GET':
+        return None, HttpResponseNotAllowed(['GET'])
+    try:
+        parsed = await sync_to_async(_get_wait_request)(request)
+    except ValueError as exc:
+        return None, JsonResponse({'error': str(exc)}, status=400)
+    except LookupError as exc:
+        return None, JsonResponse({'error': str(exc)}, status=404)
+    return parsed, None
+
+
+async def wait_status(request):
+    """Long-poll the completion of tasks and groups.
+
+    Answers once one of the tasks of the ``ids`` parameters, or every
+    task of one of the groups of the ``groups`` parameters, finished, or
+    after ``timeout`` seconds.  The response maps the tasks to their state
+    and the groups to their number of completed tasks.
+
+    The states are read by the :class:`~.poller.StatusPoller` shared by
+    all the requests waiting in the process.
+    """
+    parsed, error = await _parse_wait_request(request)
+    if error is not None:
+        return error
+    task_ids, groups, timeout = parsed
+    all_ids = set(task_ids).union(*groups.values())
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    with get_poller().subscribe(all_ids) as subscription:
+        while True:
+            remaining = deadline - loop.time()
+            await subscription.wait(max(remaining, 0))
+            completed = _any_completed(
+                subscription.statuses, task_ids, groups)
+            if completed or loop.time() >= deadline:
+                break
+        data = _status_map(subscription.statuses, task_ids, groups)
+    response = JsonResponse(data)
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+async def stream_status(request):
+    """Stream the state changes of tasks and groups as Server-Sent Events.
+
+    Takes the same parameters as :func:`wait_status`.  A ``task`` event is
+    sent with the initial state of each task of the ``ids`` parameters
+    and on every change, a ``group`` event with the progress of each
+    group of the ``groups`` parameters.  A ``done`` event ends the stream
+    once every task and group finished or after ``timeout`` seconds.
+    """
+    parsed, error = await _parse_wait_request(request)
+    if error is not None:
+        return error
+    task_ids, groups, timeout = parsed
+    heartbeat = get_setting('STATUS_STREAM_HEARTBEAT', 15)
+
+    async def events():
+        all_ids = set(task_ids).union(*groups.values())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        with get_poller().subscribe(all_ids) as subscription:
+            while loop.time() < deadline:
+                remaining = deadline - loop.time()
+                changes = await subscription.wait(min(remaining, heartbeat))
+                if not changes:
+                    yield ': keep-alive\n\n'
+                    continue
+                for task_id in task_ids:
+                    if task_id in changes:
+                        yield _event('task', {
+                            'id': task_id, 'status': changes[task_id]})
+                for group_id, members in groups.items():
+                    if not changes.keys().isdisjoint(members):
+                        yield _event('group', {
+                            'id': group_id,
+                            **_group_progress(subscription.statuses, members),
+                        })
+                if all(
+                    subscription.statuses.get(task_id) in states.READY_STATES
+                    for task_id in all_ids
+                ):
+                    break
+        yield _event('done', {})
+
+    response = StreamingHttpResponse(
+        events(), content_type='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop proxies such as nginx from buffering the events.
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Asynchronous versions of the status views, reading the tables of the
+# database backend with the asynchronous ORM (Django >= 4.1).  They fall
+# back to the synchronous views with older Django versions and other result
+# backends.
+
+
+async def _aget_group_task_ids(group_id):
+    obj = await GroupResultModel.objects.filter(group_id=group_id).afirst()
+    if obj is None:
+        return None
+    group = result_from_tuple(
+        current_app.backend.decode_content(obj, obj.result),
+        app=current_app,
+    )
+    return [async_result.id for async_result in group.results]
+
+
+async def is_task_successful_async(request, task_id):
+    """Asynchronous version of :func:`is_task_successful`."""
+    if not _uses_async_orm():
+        return await sync_to_async(is_task_successful)(request, task_id)
+    status = await TaskResult.objects.filter(task_id=task_id).values_list(
+        'status', flat=True).afirst()
+    return JsonResponse({'task': {
+        'id': task_id,
+        'executed': status == states.SUCCESS,
+    }})
+
+
+async def task_status_async(request, task_id):
+    """Asynchronous version of :func:`task_status`."""
+    if not _uses_async_orm():
+        return await sync_to_async(task_status)(request, task_id)
+    validators = await aget_task_validators(task_id)
+    not_modified = validators.get_not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    obj = await TaskResult.objects.filter(task_id=task_id).only(
+        'status', 'result', 'traceback', 'content_type',
+        'content_encoding').afirst()
+    if obj is None:
+        data = _task_data(task_id, states.PENDING, None, None)
+    else:
+        data = _task_data(
+            task_id, obj.status, _decode_result(obj), obj.traceback)
+    return validators.patch(JsonResponse({'task': data}))
+
+
+async def is_group_successful_async(request, group_id):
+    """Asynchronous version of :func:`is_group_successful`."""
+    if not _uses_async_orm():
+        return await sync_to_async(is_group_successful)(request, group_id)
+    task_ids = await _aget_group_task_ids(group_id) or []
+    return await _agroup_response(group_id, task_ids, _executed_entry)
+
+
+async def group_status_async(request, group_id):
+    """Asynchronous version of :func:`group_status`."""
+    if not _uses_async_orm():
+        return await sync_to_async(group_status)(request, group_id)
+    task_ids = await _aget_group_task_ids(group_id) or []
+    validators = await aget_group_validators(task_ids)
+    not_modified = validators.get_not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    return validators.patch(
+        await _agroup_response(group_id, task_ids, _status_entry))
@@ -1,14 +1,21 @@
+import os
 import time
+import tracemalloc
 from datetime import timedelta
 
 import pytest
 from celery import uuid
+from django.db.models import Max
 from django.test import TransactionTestCase
 
 from django_celery_results.models import TaskResult
 from django_celery_results.utils import now
 
 RECORDS_COUNT = 100000
+LARGE_RECORDS_COUNT = int(
+    os.environ.get('BENCHMARK_LARGE_RECORDS_COUNT', 10000000)
+)
+INSERT_CHUNK_SIZE = 50000
 
 
 @pytest.fixture()
@@ -68,3 +75,56 @@ class benchmark_Models(TransactionTestCase):
             'bench time: {bench:.2f}\n'
         ).format(setup=after_setup - start, bench=done - after_setup))
         assert self.benchmark.stats.stats.max < 5
+
+    def setup_large_records_to_delete(self, count):
+        # Rows are inserted chunk by chunk to keep the benchmark itself from
+        # holding millions of objects; the first half of them is expired.
+        expired_date = now() - timedelta(days=10)
+        for offset in range(0, count, INSERT_CHUNK_SIZE):
+            size = min(INSERT_CHUNK_SIZE, count - offset)
+            last_id = TaskResult.objects.aggregate(last=Max('id'))['last']
+            TaskResult.objects.bulk_create(
+                [TaskResult(task_id=uuid()) for _ in range(size)],
+                batch_size=5000,
+            )
+            if offset < count // 2:
+                TaskResult.objects.filter(id__gt=last_id or 0).update(
+                    date_done=expired_date)
+
+    def test_taskresult_delete_expired_large_table(self):
+        start = time.time()
+        self.setup_large_records_to_delete(LARGE_RECORDS_COUNT)
+        expired = TaskResult.objects.get_all_expired(
+            self.app.conf.result_expires).count()
+        after_setup = time.time()
+
+        tracemalloc.start()
+        result = self.benchmark.pedantic(
+            TaskResult.objects.delete_expired,
+            args=(self.app.conf.result_expires,),
+            kwargs={'batch_size': 10000},
+            iterations=1,
+            rounds=1,
+        )
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        done = time.time()
+
+        assert result.complete
+        assert result.deleted == expired
+        assert TaskResult.objects.count() == LARGE_RECORDS_COUNT - expired
+
+        print((
+            '------'
+            'setup time: {setup:.2f}\n'
+            'bench time: {bench:.2f}\n'
+            'rows/second: {rate:.0f}\n'
+            'peak memory: {memory:.2f} MiB\n'
+        ).format(
+            setup=after_setup - start,
+            bench=done - after_setup,
+            rate=result.deleted / result.elapsed,
+            memory=peak_memory / 1024 / 1024,
+        ))
+        # Memory must not grow with the number of expired rows.
+        assert peak_memory < 16 * 1024 * 1024
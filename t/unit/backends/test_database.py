@@ -12,10 +12,21 @@ from celery.result import AsyncResult, GroupResult
 from celery.utils.serialization import b64decode
 from celery.worker.request import Request
 from celery.worker.strategy import hybrid_to_proto2
-from django.test import TransactionTestCase
+from django.db import DatabaseError, connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from django_celery_results.backends.database import DatabaseBackend
-from django_celery_results.models import ChordCounter, TaskResult
+from django_celery_results.managers import expiry_result_t
+from django_celery_results.models import ChordCounter
+from django_celery_results.models import GroupResult as GroupResultModel
+from django_celery_results.models import GroupResultMember as GroupMemberModel
+from django_celery_results.models import TaskResult, TaskResultRollup
+from django_celery_results.utils import now
+
+
+def no_replication_lag():
+    return 0
 
 
 class SomeClass:
@@ -584,6 +595,37 @@ class test_DatabaseBackend:
         assert tr.date_started == date_started
         assert tr.date_done > date_done
 
+    def test_backend__task_result_expires_at(self):
+        tid = uuid()
+        self.b.mark_as_done(tid, 42)
+
+        expires_at = TaskResult.objects.get(task_id=tid).expires_at
+        expected = now() + datetime.timedelta(seconds=self.b.expires)
+        assert expected - expires_at < datetime.timedelta(minutes=1)
+
+        @self.app.task(shared=False, result_expires=60)
+        def ping():
+            pass
+
+        tid = uuid()
+        self.b.mark_as_done(tid, 42, request=Context(task=ping.name))
+        expires_at = TaskResult.objects.get(task_id=tid).expires_at
+        assert expires_at - now() <= datetime.timedelta(seconds=60)
+
+        # A retention policy without horizon keeps the result forever
+        tid = uuid()
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'RETENTION_POLICIES': [
+                {'status': states.FAILURE, 'expires': None},
+            ],
+        }):
+            self.b.mark_as_failure(tid, KeyError('foo'))
+        assert TaskResult.objects.get(task_id=tid).expires_at is None
+
+        gid = uuid()
+        self.b.save_group(gid, GroupResult(gid, [AsyncResult(tid)]))
+        assert GroupResultModel.objects.get(group_id=gid).expires_at
+
     def xxx_backend(self):
         tid = uuid()
 
@@ -614,6 +656,59 @@ class test_DatabaseBackend:
             x._cache = None
         assert x.result is None
 
+    def test_forget_many(self):
+        tids = [uuid() for i in range(5)]
+        for tid in tids:
+            self.b.mark_as_done(tid, 42)
+        kept = uuid()
+        self.b.mark_as_done(kept, 42)
+
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'BULK_CHUNK_SIZE': 2,
+        }), CaptureQueriesContext(connection) as queries:
+            assert self.b.forget_many(tids + [uuid()]) == 5
+
+        # One DELETE per chunk, without fetching the rows first
+        assert [q['sql'].split()[0] for q in queries] == ['DELETE'] * 3
+        assert list(TaskResult.objects.values_list(
+            'task_id', flat=True)) == [kept]
+
+    def test_forget_result_set(self):
+        parent, child, other = uuid(), uuid(), uuid()
+        for tid in (parent, child, other):
+            self.b.mark_as_done(tid, 42)
+        gid = uuid()
+        group = GroupResult(gid, [
+            AsyncResult(child, parent=AsyncResult(parent)),
+            GroupResult(uuid(), [AsyncResult(other)]),
+        ])
+        self.b.save_group(gid, group)
+
+        assert self.b.forget_result_set(group) == 3
+
+        assert not TaskResult.objects.exists()
+        assert not GroupResultModel.objects.filter(group_id=gid).exists()
+
+    def test_delete_group(self):
+        gid = uuid()
+        self.b.save_group(gid, GroupResult(gid, [AsyncResult(uuid())]))
+
+        self.b.delete_group(gid)
+
+        assert not GroupResultModel.objects.filter(group_id=gid).exists()
+        assert not GroupMemberModel.objects.exists()
+        # Deleting a missing group is a no-op
+        self.b.delete_group(gid)
+
+    def test_save_group_atomic(self):
+        gid = uuid()
+        with mock.patch.object(
+                GroupMemberModel._default_manager, 'store_members',
+                side_effect=DatabaseError), pytest.raises(DatabaseError):
+            self.b.save_group(gid, GroupResult(gid, [AsyncResult(uuid())]))
+
+        assert not GroupResultModel.objects.filter(group_id=gid).exists()
+
     def test_secrets__pickle_serialization(self):
         self.app.conf.result_serializer = 'pickle'
         self.app.conf.accept_content = {'pickle', 'json'}
@@ -768,6 +863,87 @@ class test_DatabaseBackend:
         # Celery 5.1
         self.b.apply_chord((uuid(), subtasks), self.add.s())
 
+    def test_apply_chord_compact_sub_tasks(self):
+        """Test if flat chord headers are stored as a packed list of ids"""
+        gid = uuid()
+        subtasks = [AsyncResult(uuid()) for _ in range(3)]
+        with override_settings(
+            DJANGO_CELERY_RESULTS={'CHORD_COMPACT_SUB_TASKS': True}
+        ):
+            self.b.apply_chord(
+                GroupResult(id=gid, results=subtasks), self.add.s())
+
+        chord_counter = ChordCounter.objects.get(group_id=gid)
+        assert chord_counter.sub_tasks == 'ids:' + ','.join(
+            r.id for r in subtasks)
+        assert chord_counter.group_result(app=self.app).results == subtasks
+
+    def test_apply_chord_compact_sub_tasks_disabled(self):
+        """Test if chord headers are stored as JSON unless enabled"""
+        gid = uuid()
+        subtasks = [AsyncResult(uuid()) for _ in range(3)]
+        self.b.apply_chord(GroupResult(id=gid, results=subtasks), self.add.s())
+
+        chord_counter = ChordCounter.objects.get(group_id=gid)
+        assert chord_counter.sub_tasks == json.dumps(
+            [r.as_tuple() for r in subtasks])
+        assert chord_counter.group_result(app=self.app).results == subtasks
+
+    def test_encode_sub_tasks_without_compression(self):
+        """Test if compress_threshold=None disables compression"""
+        subtasks = [AsyncResult(uuid()) for _ in range(100)]
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'CHORD_COMPACT_SUB_TASKS': True,
+            'CHORD_COMPRESS_THRESHOLD': 10,
+        }):
+            assert ChordCounter.encode_sub_tasks(
+                subtasks).startswith('zids:')
+            assert ChordCounter.encode_sub_tasks(
+                subtasks, compress_threshold=None).startswith('ids:')
+
+    def test_apply_chord_compressed_sub_tasks(self):
+        """Test if large flat chord headers are compressed"""
+        gid = uuid()
+        subtasks = [AsyncResult(uuid()) for _ in range(5000)]
+        with override_settings(
+            DJANGO_CELERY_RESULTS={
+                'CHORD_COMPACT_SUB_TASKS': True,
+                'CHORD_COMPRESS_THRESHOLD': 1024,
+            }
+        ):
+            self.b.apply_chord(
+                GroupResult(id=gid, results=subtasks), self.add.s())
+
+        chord_counter = ChordCounter.objects.get(group_id=gid)
+        assert chord_counter.sub_tasks.startswith('zids:')
+        assert len(chord_counter.sub_tasks) < 5000 * 36
+        assert chord_counter.group_result(app=self.app).results == subtasks
+
+    def test_apply_chord_nested_sub_tasks(self):
+        """Test if headers with parents or groups keep the JSON format"""
+        gid = uuid()
+        parent = AsyncResult(uuid())
+        nested = GroupResult(id=uuid(), results=[AsyncResult(uuid())])
+        subtasks = [AsyncResult(uuid(), parent=parent), nested]
+        self.b.apply_chord(GroupResult(id=gid, results=subtasks), self.add.s())
+
+        chord_counter = ChordCounter.objects.get(group_id=gid)
+        assert chord_counter.sub_tasks == json.dumps(
+            [r.as_tuple() for r in subtasks])
+        restored = chord_counter.group_result(app=self.app).results
+        assert restored == subtasks
+        assert restored[0].parent == parent
+
+    def test_chord_counter_legacy_sub_tasks(self):
+        """Test if sub_tasks stored by previous versions can be decoded"""
+        subtasks = [AsyncResult(uuid()), AsyncResult(uuid())]
+        chord_counter = ChordCounter.objects.create(
+            group_id=uuid(),
+            sub_tasks=json.dumps([r.as_tuple() for r in subtasks]),
+            count=2,
+        )
+        assert chord_counter.group_result(app=self.app).results == subtasks
+
     def test_on_chord_part_return(self):
         """Test if the ChordCounter is properly decremented and the callback is
         triggered after all chord parts have returned"""
@@ -780,6 +956,7 @@ class test_DatabaseBackend:
 
         chord_counter = ChordCounter.objects.get(group_id=gid)
         assert chord_counter.count == 2
+        date_updated = chord_counter.date_updated
 
         request = mock.MagicMock()
         request.id = subtasks[0].id
@@ -791,6 +968,8 @@ class test_DatabaseBackend:
         request.kwargsrepr = "kwargsrepr"
         request.hostname = "celery@ip-0-0-0-0"
         request.periodic_task_name = "my_periodic_task"
+        request.parent_id = None
+        request.root_id = None
         request.ignore_result = False
         result = {"foo": "baz"}
 
@@ -798,6 +977,7 @@ class test_DatabaseBackend:
 
         chord_counter.refresh_from_db()
         assert chord_counter.count == 1
+        assert chord_counter.date_updated > date_updated
 
         self.b.mark_as_done(tid2, result, request=request)
 
@@ -806,6 +986,123 @@ class test_DatabaseBackend:
 
         request.chord.delay.assert_called_once()
 
+    def test_cleanup_expired_chord_counters(self):
+        """Test if cleanup removes chord counters of lost header tasks"""
+        gid = uuid()
+        self.b.apply_chord(
+            GroupResult(id=gid, results=[AsyncResult(uuid())]), self.add.s())
+        ChordCounter.objects.filter(group_id=gid).update(
+            date_created=now() - datetime.timedelta(days=2),
+            date_updated=now() - datetime.timedelta(days=2))
+
+        self.b.cleanup()
+
+        assert not ChordCounter.objects.filter(group_id=gid).exists()
+
+    def test_cleanup_keeps_progressing_chord_counters(self):
+        """Test if cleanup keeps old chords whose header makes progress"""
+        gid = uuid()
+        subtasks = [AsyncResult(uuid()), AsyncResult(uuid())]
+        self.b.apply_chord(
+            GroupResult(id=gid, results=subtasks), self.add.s())
+        ChordCounter.objects.filter(group_id=gid).update(
+            date_created=now() - datetime.timedelta(days=2),
+            date_updated=now() - datetime.timedelta(days=2))
+
+        request = mock.MagicMock()
+        request.id = subtasks[0].id
+        request.group = gid
+        self.b.on_chord_part_return(request, states.SUCCESS, None)
+        self.b.cleanup()
+
+        assert ChordCounter.objects.get(group_id=gid).count == 1
+
+    def test_cleanup_throttle_settings(self):
+        """Test if cleanup passes the throttling settings to delete_expired"""
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'CLEANUP_BATCH_SIZE': 500,
+            'CLEANUP_RATE': 1000,
+            'CLEANUP_LAG_PROBE': __name__ + '.no_replication_lag',
+            'CLEANUP_MAX_LAG': 10,
+        }), mock.patch.object(
+            TaskResult._default_manager, 'delete_expired',
+            return_value=expiry_result_t(0, 1, 0.1, True),
+        ) as delete_expired:
+            self.b.cleanup()
+
+        _, kwargs = delete_expired.call_args
+        assert kwargs['batch_size'] == 500
+        assert kwargs['rate'] == 1000
+        assert kwargs['lag_probe'] is no_replication_lag
+        assert kwargs['max_lag'] == 10
+        assert kwargs['max_lag_wait'] == 600
+        assert callable(kwargs['progress'])
+
+    def test_cleanup_retention_policies(self):
+        """Test if cleanup applies the retention policies to task results"""
+        policies = [{'task_name': 'proj.ping', 'expires': 60}]
+        self.b.expires = None
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'RETENTION_POLICIES': policies,
+        }), mock.patch.object(
+            TaskResult._default_manager, 'delete_expired',
+            return_value=expiry_result_t(0, 1, 0.1, True),
+        ) as delete_expired:
+            self.b.cleanup()
+
+        # Without result_expires only the task results have something to do
+        delete_expired.assert_called_once()
+        args, kwargs = delete_expired.call_args
+        assert args == (None,)
+        assert kwargs['policies'] is policies
+
+    def test_cleanup_drops_expired_partitions(self):
+        """Test if cleanup drops the partitions of a partitioned table"""
+        database = 'django_celery_results.backends.database'
+        with mock.patch(f'{database}.is_partitioned', return_value=True), \
+                mock.patch(f'{database}.drop_expired_partitions',
+                           return_value=['p1']) as drop:
+            self.b.cleanup()
+
+        drop.assert_called_once()
+        args, kwargs = drop.call_args
+        assert args[1:] == (TaskResult, self.b.expires, None)
+        assert kwargs == {'detach_only': False}
+
+    def test_cleanup_maintenance_threshold(self):
+        """Test if cleanup runs table maintenance after large deletions"""
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'MAINTENANCE_THRESHOLD': 10,
+        }), mock.patch.object(
+            TaskResult._default_manager, 'delete_expired',
+            return_value=expiry_result_t(10, 1, 0.1, True),
+        ), mock.patch.object(
+            TaskResult._default_manager, 'run_maintenance',
+        ) as run_maintenance, mock.patch.object(
+            GroupResultModel._default_manager, 'run_maintenance',
+        ) as run_group_maintenance:
+            run_maintenance.return_value.elapsed = 0.5
+            self.b.cleanup()
+
+        run_maintenance.assert_called_once_with(optimize=False)
+        # No group result was deleted
+        run_group_maintenance.assert_not_called()
+
+    def test_cleanup_rolls_up_before_deleting(self):
+        """Test if cleanup aggregates task results before expiring them"""
+        tid = uuid()
+        self.b.mark_as_done(tid, 42)
+        TaskResult.objects.filter(task_id=tid).update(
+            date_done=now() - datetime.timedelta(days=2), expires_at=None)
+
+        with override_settings(DJANGO_CELERY_RESULTS={'ROLLUP': True}):
+            self.b.cleanup()
+
+        assert not TaskResult.objects.filter(task_id=tid).exists()
+        rollup = TaskResultRollup.objects.get()
+        assert rollup.status == states.SUCCESS
+        assert rollup.count == 1
+
     def test_on_chord_part_return_counter_not_found(self):
         """Test if the chord does not raise an error if the ChordCounter is
         not found
@@ -841,6 +1138,8 @@ class test_DatabaseBackend:
         request.kwargsrepr = "kwargsrepr"
         request.hostname = "celery@ip-0-0-0-0"
         request.periodic_task_name = "my_periodic_task"
+        request.parent_id = None
+        request.root_id = None
         request.ignore_result = False
         request.chord.id = cid
         result = {"foo": "baz"}
@@ -887,6 +1186,8 @@ class test_DatabaseBackend:
         request.kwargsrepr = "kwargsrepr"
         request.hostname = "celery@ip-0-0-0-0"
         request.periodic_task_name = "my_periodic_task"
+        request.parent_id = None
+        request.root_id = None
         request.chord.id = cid
         result = {"foo": "baz"}
 
@@ -929,6 +1230,117 @@ class test_DatabaseBackend:
 
         assert restored_group == group
 
+    def test_group_progress(self):
+        task_ids = [uuid() for _ in range(4)]
+        group = GroupResult(
+            id=uuid(), results=[AsyncResult(id=i) for i in task_ids])
+        group.save(backend=self.b)
+        members = GroupMemberModel.objects
+        assert set(members.filter(group_id=group.id).values_list(
+            'task_id', flat=True)) == set(task_ids)
+
+        self.b.mark_as_done(task_ids[0], 1)
+        self.b.mark_as_failure(task_ids[1], KeyError('x'))
+        self.b.mark_as_started(task_ids[2])
+        with CaptureQueriesContext(connection) as queries:
+            progress = self.b.group_progress(group.id)
+        # One query counting the members, one counting them by state
+        assert len(queries) == 2
+        assert progress == (4, 2, 1, False, {
+            states.SUCCESS: 1, states.FAILURE: 1,
+            states.STARTED: 1, states.PENDING: 1,
+        })
+        assert self.b.group_progress(uuid()) is None
+
+        # Groups saved before their members were recorded
+        members.filter(group_id=group.id).delete()
+        assert self.b.group_progress(group.id) == progress
+
+        self.b.mark_as_done(task_ids[2], 1)
+        self.b.mark_as_revoked(task_ids[3])
+        assert self.b.group_progress(group.id).ready
+
+    @override_settings(DJANGO_CELERY_RESULTS={'GROUP_COUNTERS': True})
+    def test_group_counters(self):
+        gid = uuid()
+        task_ids = [uuid() for _ in range(4)]
+        self.b.mark_as_done(task_ids[0], 1)
+        self.b.save_group(
+            gid, GroupResult(gid, [AsyncResult(i) for i in task_ids]))
+        group = GroupResultModel.objects.get(group_id=gid)
+        assert (group.total, group.succeeded, group.failed) == (4, 1, 0)
+        assert group.completed_count() == 1
+        assert group.ready() is False
+
+        for task_id in task_ids[1:]:
+            self.b.store_result(task_id, None, states.STARTED,
+                                request=Context(id=task_id, group=gid))
+        with CaptureQueriesContext(connection) as queries:
+            self.b.mark_as_done(
+                task_ids[1], 1, request=Context(id=task_ids[1], group=gid))
+        updates = [query['sql'] for query in queries
+                   if query['sql'].startswith('UPDATE')]
+        assert 'counted' in updates[-2]
+        assert 'succeeded' in updates[-1]
+        self.b.mark_as_failure(task_ids[2], KeyError('x'),
+                               request=Context(id=task_ids[2], group=gid))
+        # A result stored again is not counted twice
+        self.b.mark_as_failure(task_ids[2], KeyError('x'),
+                               request=Context(id=task_ids[2], group=gid))
+        self.b.mark_as_revoked(
+            task_ids[3], request=Context(id=task_ids[3], group=gid))
+        group.refresh_from_db()
+        assert (group.total, group.succeeded, group.failed) == (4, 2, 2)
+        assert group.completed_count() == 2
+        assert group.ready() is True
+
+        # Saving the group again recounts its finished tasks
+        self.b.save_group(
+            gid, GroupResult(gid, [AsyncResult(i) for i in task_ids]))
+        group.refresh_from_db()
+        assert (group.total, group.succeeded, group.failed) == (4, 2, 2)
+
+    @override_settings(DJANGO_CELERY_RESULTS={'GROUP_COUNTERS': True})
+    def test_group_counters_task_done_while_saving(self):
+        gid, tid = uuid(), uuid()
+        count_ready_tasks = GroupResultModel.objects.count_ready_tasks
+
+        def finish_then_count(group_id):
+            # The task finishes after the members are saved, and stores
+            # its result before the finished tasks are counted.
+            self.b.mark_as_done(tid, 1, request=Context(id=tid, group=gid))
+            count_ready_tasks(group_id)
+
+        with mock.patch.object(GroupResultModel.objects, 'count_ready_tasks',
+                               side_effect=finish_then_count):
+            self.b.save_group(gid, GroupResult(gid, [AsyncResult(tid)]))
+        group = GroupResultModel.objects.get(group_id=gid)
+        assert (group.total, group.succeeded, group.failed) == (1, 1, 0)
+        assert GroupMemberModel.objects.get(task_id=tid).counted
+
+    def test_group_without_counters(self):
+        gid, tid = uuid(), uuid()
+        self.b.save_group(gid, GroupResult(gid, [AsyncResult(tid)]))
+        with override_settings(
+                DJANGO_CELERY_RESULTS={'GROUP_COUNTERS': True}):
+            self.b.mark_as_done(tid, 1, request=Context(id=tid, group=gid))
+        group = GroupResultModel.objects.get(group_id=gid)
+        assert not group.has_counters
+        assert group.succeeded is None
+        assert group.ready() is None
+
+    def test_cleanup_prunes_group_members(self):
+        deleted, kept = uuid(), uuid()
+        for group_id in (deleted, kept):
+            self.b.save_group(
+                group_id, GroupResult(group_id, [AsyncResult(uuid())]))
+        GroupResultModel.objects.filter(group_id=deleted).delete()
+
+        self.b.cleanup()
+
+        assert list(GroupMemberModel.objects.values_list(
+            'group_id', flat=True)) == [kept]
+
     def test_backend_result_extended_is_false(self):
         self.app.conf.result_extended = False
         self.b = DatabaseBackend(app=self.app)
@@ -1033,6 +1445,8 @@ class ChordPartReturnTestCase(TransactionTestCase):
             request.kwargsrepr = "kwargsrepr"
             request.hostname = "celery@ip-0-0-0-0"
             request.periodic_task_name = "my_periodic_task"
+            request.parent_id = None
+            request.root_id = None
             request.ignore_result = False
             result = {"foo": "baz"}
 
@@ -8,7 +8,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.messages import constants, get_messages
 from django.contrib.messages.middleware import MessageMiddleware
 from django.contrib.sessions.middleware import SessionMiddleware
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import (
     clear_url_caches,
     get_resolver,
@@ -16,8 +16,12 @@ from django.urls import (
     reverse,
 )
 
-from django_celery_results.admin import TaskResultAdmin
-from django_celery_results.models import TaskResult
+from django_celery_results.admin import GroupResultAdmin, TaskResultAdmin
+from django_celery_results.models import (
+    GroupResult,
+    TaskResult,
+    TaskResultFacet,
+)
 
 
 @pytest.mark.usefixtures('depends_on_current_app')
@@ -37,6 +41,44 @@ class test_Admin(TestCase):
         taskmeta, _ = TaskResult.objects.get_or_create(task_id=task_id)
         return taskmeta
 
+    def search(self, term):
+        queryset, may_have_duplicates = self.task_admin.get_search_results(
+            self.factory.get('/'), TaskResult.objects.all(), term)
+        self.assertFalse(may_have_duplicates)
+        return set(queryset.values_list('task_id', flat=True))
+
+    def test_search(self):
+        task_id = uuid()
+        TaskResult.objects.create(
+            task_id=task_id, task_name='proj.add', status='SUCCESS',
+            task_args='(2, 2)', task_kwargs='{"user": "alice"}')
+        other = TaskResult.objects.create(
+            task_id=uuid(), task_name='proj.mul', status='FAILURE',
+            periodic_task_name='nightly')
+
+        self.assertEqual(self.search(''), {task_id, other.task_id})
+        self.assertEqual(self.search(f' {task_id} '), {task_id})
+        self.assertEqual(self.search(task_id[:8]), {task_id})
+        self.assertEqual(self.search('proj.a'), {task_id})
+        self.assertEqual(self.search('night'), {other.task_id})
+        self.assertEqual(self.search('failure'), {other.task_id})
+        # Arguments are only searched on demand, and no infix matching
+        self.assertEqual(self.search('alice'), set())
+        self.assertEqual(self.search('mul'), set())
+        self.assertEqual(self.search('args: alice'), {task_id})
+
+    def test_group_search(self):
+        group_admin = GroupResultAdmin(model=GroupResult, admin_site=None)
+        group_id = uuid()
+        GroupResult.objects.create(group_id=group_id)
+        GroupResult.objects.create(group_id=uuid())
+        for term in (group_id, group_id[:8]):
+            queryset, _ = group_admin.get_search_results(
+                self.factory.get('/'), GroupResult.objects.all(), term)
+            self.assertEqual(
+                list(queryset.values_list('group_id', flat=True)),
+                [group_id])
+
     @patch('django_celery_results.admin.celery_app.control.terminate')
     def test_terminate_task_success(self, mock_terminate):
         # Create mock request
@@ -68,6 +110,24 @@ class test_Admin(TestCase):
             "2 task(s) was terminated successfully.")
         self.assertEqual(messages[0].level, constants.SUCCESS)
 
+    @patch('django_celery_results.admin.celery_app.control.terminate')
+    def test_terminate_task_chunks(self, mock_terminate):
+        request = self.factory.post('/')
+        request.user = MagicMock()
+        self._apply_middleware(request)
+        task_ids = [self.create_task_result().task_id for _ in range(5)]
+
+        with override_settings(DJANGO_CELERY_RESULTS={'BULK_CHUNK_SIZE': 2}):
+            self.task_admin.terminate_task(
+                request, TaskResult.objects.filter(task_id__in=task_ids))
+
+        chunks = [call[0][0] for call in mock_terminate.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(sorted(sum(chunks, [])), sorted(task_ids))
+        messages = list(get_messages(request))
+        self.assertEqual(
+            str(messages[0]), "5 task(s) was terminated successfully.")
+
     @patch('django_celery_results.admin.celery_app.control.terminate')
     def test_terminate_task_failure(self, mock_terminate):
         # Create mock request
@@ -126,6 +186,84 @@ class TaskResultAdminTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
 
+    def test_changelist_facet_filters(self):
+        TaskResultFacet.objects.create(field='task_name', value='test_task')
+        TaskResultFacet.objects.create(field='task_name', value='other_task')
+        url = reverse(
+            f"admin:{self.app_name}_{self.model._meta.model_name}_changelist"
+        )
+        response = self.client.get(url, {'task_name': 'other_task'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 0)
+        filters = {
+            spec.parameter_name: spec.lookup_choices
+            for spec in response.context['cl'].filter_specs
+            if hasattr(spec, 'parameter_name')
+        }
+        self.assertEqual(
+            filters['task_name'],
+            [('other_task', 'other_task'), ('test_task', 'test_task')],
+        )
+        self.assertNotIn('worker', filters)
+        self.assertIn(('SUCCESS', 'SUCCESS'), filters['status'])
+
+    def test_changelist_defers_payload(self):
+        url = reverse(
+            f"admin:{self.app_name}_{self.model._meta.model_name}_changelist"
+        )
+        response = self.client.get(url)
+        result = response.context['cl'].result_list[0]
+        self.assertEqual(
+            result.get_deferred_fields(),
+            {'result', 'meta', 'traceback', 'task_args', 'task_kwargs'},
+        )
+
+    def test_delete_batched_action(self):
+        url = reverse(
+            f"admin:{self.app_name}_{self.model._meta.model_name}_changelist"
+        )
+        other = TaskResult.objects.create(task_id=uuid(), task_name='other')
+        data = {
+            'action': 'delete_batched',
+            '_selected_action': [self.task_result.pk],
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['count'], 1)
+        self.assertContains(
+            response,
+            f'delete the 1 selected {self.model._meta.verbose_name_plural}')
+        self.assertEqual(TaskResult.objects.count(), 2)
+
+        response = self.client.post(url, {**data, 'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(TaskResult.objects.values_list('pk', flat=True)),
+            [other.pk])
+
+    def test_delete_batched_action_select_across(self):
+        url = reverse(
+            f"admin:{self.app_name}_{self.model._meta.model_name}_changelist"
+        )
+        kept = TaskResult.objects.create(task_id=uuid(), task_name='kept')
+        TaskResult.objects.create(task_id=uuid(), task_name='test_task')
+        data = {
+            'action': 'delete_batched',
+            '_selected_action': [self.task_result.pk],
+            'select_across': '1',
+        }
+        filtered = f'{url}?task_name=test_task'
+        response = self.client.post(filtered, data)
+        self.assertEqual(response.context['count'], 2)
+        self.assertContains(response, 'matching the current filters')
+
+        with override_settings(
+                DJANGO_CELERY_RESULTS={'CLEANUP_BATCH_SIZE': 1}):
+            self.client.post(filtered, {**data, 'post': 'yes'})
+        self.assertEqual(
+            list(TaskResult.objects.values_list('pk', flat=True)),
+            [kept.pk])
+
     def test_change_view(self):
         url = reverse(
             f"admin:{self.app_name}_{self.model._meta.model_name}_change",
@@ -0,0 +1,116 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from celery import states, uuid
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from django_celery_results.archive import (
+    archive_expired,
+    iter_archive,
+    restore_archive,
+)
+from django_celery_results.backends import DatabaseBackend
+from django_celery_results.models import GroupResult, TaskResult
+from django_celery_results.utils import now
+
+
+class test_Archive(TestCase):
+
+    @pytest.fixture(autouse=True)
+    def setup_storage(self, tmp_path):
+        self.storage = FileSystemStorage(location=str(tmp_path))
+
+    def create_expired_task_results(self, count):
+        TaskResult.objects.bulk_create([
+            TaskResult(task_id=uuid(), task_name='proj.ping',
+                       status=states.SUCCESS, result='42')
+            for i in range(count)
+        ])
+        TaskResult.objects.update(date_done=now() - timedelta(days=2))
+
+    def test_archive_then_delete(self):
+        self.create_expired_task_results(25)
+        fresh = TaskResult.objects.create(task_id=uuid())
+        expired_ids = list(TaskResult.objects.exclude(
+            pk=fresh.pk).order_by('id').values_list('id', flat=True))
+
+        result, names = archive_expired(
+            TaskResult.objects, timedelta(days=1), storage=self.storage,
+            rows_per_file=10, chunk_size=4, batch_size=3,
+        )
+
+        assert result.deleted == 25
+        assert result.complete
+        assert len(names) == 3
+        assert names[0].startswith('celery_results_archive/taskresult/')
+        assert list(TaskResult.objects.all()) == [fresh]
+        archived = [
+            row for name in names for row in iter_archive(name, self.storage)
+        ]
+        assert [row['id'] for row in archived] == expired_ids
+        assert archived[0]['task_name'] == 'proj.ping'
+        with self.storage.open(names[0], 'rb') as data:
+            line = gzip.decompress(data.read()).splitlines()[0]
+        assert json.loads(line)['result'] == '42'
+
+    def test_archive_time_budget(self):
+        self.create_expired_task_results(5)
+
+        result, names = archive_expired(
+            TaskResult.objects, timedelta(days=1), storage=self.storage,
+            time_budget=0,
+        )
+
+        assert not result.complete
+        assert names == []
+        assert TaskResult.objects.count() == 5
+
+    def test_restore(self):
+        self.create_expired_task_results(5)
+        date_done = TaskResult.objects.first().date_done
+        _, names = archive_expired(
+            TaskResult.objects, timedelta(days=1), storage=self.storage)
+        assert not TaskResult.objects.exists()
+
+        assert restore_archive(TaskResult, names[0], self.storage) == 5
+        assert TaskResult.objects.count() == 5
+        assert set(TaskResult.objects.values_list(
+            'date_done', flat=True)) == {date_done}
+        assert TaskResult.objects.first().result == '42'
+
+        # Rows already in the table are skipped
+        assert restore_archive(TaskResult, names[0], self.storage) == 0
+
+    def test_restore_command(self):
+        GroupResult.objects.create(group_id=uuid(), result='[]')
+        GroupResult.objects.update(date_done=now() - timedelta(days=2))
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'ARCHIVE_STORAGE': self.storage,
+        }):
+            _, names = archive_expired(GroupResult.objects, 86400)
+            out = StringIO()
+            call_command('celery_results_restore_archive', *names,
+                         stdout=out)
+
+        assert f'{names[0]}: restored 1 row(s).' in out.getvalue()
+        assert GroupResult.objects.count() == 1
+
+    @pytest.mark.usefixtures('depends_on_current_app')
+    def test_cleanup_archives(self):
+        self.create_expired_task_results(3)
+        backend = DatabaseBackend(app=self.app)
+        backend.expires = 86400
+        with override_settings(DJANGO_CELERY_RESULTS={
+            'ARCHIVE': True,
+            'ARCHIVE_STORAGE': self.storage,
+        }):
+            backend.cleanup()
+
+        assert not TaskResult.objects.exists()
+        names = self.storage.listdir('celery_results_archive/taskresult')[1]
+        assert len(names) == 1
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from io import StringIO
+
+from celery import uuid
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from django_celery_results.models import ChordCounter, GroupResult, TaskResult
+from django_celery_results.utils import now
+
+
+class test_StalledChordsCommand(TestCase):
+
+    def test_lists_stalled_chords(self):
+        stalled = ChordCounter.objects.create(
+            group_id=uuid(), sub_tasks='ids:', count=3)
+        active = ChordCounter.objects.create(
+            group_id=uuid(), sub_tasks='ids:', count=3)
+        ChordCounter.objects.filter(pk=stalled.pk).update(
+            date_updated=now() - timedelta(hours=2))
+
+        out = StringIO()
+        call_command('celery_results_stalled_chords', stdout=out)
+
+        output = out.getvalue()
+        assert f'{stalled.group_id}  remaining=3' in output
+        assert active.group_id not in output
+        assert '1 stalled chord(s).' in output
+
+
+class test_CleanupCommand(TransactionTestCase):
+
+    def setUp(self):
+        TaskResult.objects.bulk_create(
+            [TaskResult(task_id=uuid()) for i in range(30)]
+        )
+        TaskResult.objects.update(date_done=now() - timedelta(days=2))
+        self.fresh = TaskResult.objects.create(task_id=uuid())
+        GroupResult.objects.create(
+            group_id=uuid(), expires_at=now() - timedelta(minutes=1))
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('celery_results_cleanup', '--dry-run', '--workers=2',
+                     '--expires=86400', stdout=out)
+
+        output = out.getvalue()
+        assert 'task results: 30 expired row(s) in 8 id range(s).' in output
+        assert 'group results: 1 expired row(s) in 1 id range(s).' in output
+        assert TaskResult.objects.count() == 31
+
+    def test_deletes_expired_rows(self):
+        out = StringIO()
+        call_command('celery_results_cleanup', '--workers=1',
+                     '--ranges-per-worker=3', '--batch-size=4',
+                     '--expires=86400', stdout=out)
+
+        output = out.getvalue()
+        assert 'task results: deleted 30 row(s)' in output
+        assert '3 id range(s)' in output
+        assert 'group results: deleted 1 row(s)' in output
+        assert list(TaskResult.objects.all()) == [self.fresh]
+        assert not GroupResult.objects.exists()
+
+    def test_time_budget(self):
+        out = StringIO()
+        call_command('celery_results_cleanup', '--time-budget=0',
+                     '--expires=86400', stdout=out)
+
+        assert 'task results: deleted 0 row(s)' in out.getvalue()
+        assert 'time budget exhausted' in out.getvalue()
+        assert TaskResult.objects.count() == 31
@@ -1,14 +1,23 @@
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from unittest.mock import patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 from celery import states, uuid
-from django.db import transaction
+from celery.app.task import Context
+from django.db import connections, transaction
 from django.db.utils import InterfaceError
 from django.test import TransactionTestCase
 
+from django_celery_results import managers
 from django_celery_results.backends import DatabaseBackend
-from django_celery_results.models import GroupResult, TaskResult
+from django_celery_results.models import (
+    ChordCounter,
+    GroupResult,
+    TaskResult,
+    TaskResultFacet,
+    TaskResultRollup,
+)
 from django_celery_results.utils import now
 
 
@@ -226,6 +235,404 @@ class test_Models(TransactionTestCase):
         # All expired records should be gone
         assert TaskResult.objects.get_all_expired(0).count() == 0
 
+    def test_result_batch_deletion_same_date_done(self):
+        # Rows sharing a date_done are split across batches by id
+        date_done = now() - timedelta(days=1)
+        TaskResult.objects.bulk_create(
+            [TaskResult(task_id=uuid()) for i in range(60)]
+        )
+        TaskResult.objects.update(date_done=date_done)
+
+        result = TaskResult.objects.delete_expired(0, batch_size=25)
+
+        assert result.deleted == 60
+        assert result.batches == 3
+        assert result.complete
+        assert not TaskResult.objects.exists()
+
+    def create_expired_task_results(self, count):
+        TaskResult.objects.bulk_create(
+            [TaskResult(task_id=uuid()) for i in range(count)]
+        )
+        TaskResult.objects.update(date_done=now() - timedelta(days=1))
+
+    @contextmanager
+    def fake_clock(self):
+        clock = [0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with patch('django_celery_results.managers.monotonic',
+                   side_effect=lambda: clock[0]), \
+                patch('django_celery_results.managers.sleep',
+                      side_effect=sleep) as sleeper:
+            yield sleeper
+
+    def test_result_batch_deletion_time_budget(self):
+        self.create_expired_task_results(50)
+
+        result = TaskResult.objects.delete_expired(
+            0, batch_size=10, time_budget=0)
+        assert result == (0, 0, result.elapsed, False)
+        assert TaskResult.objects.count() == 50
+
+        with self.fake_clock():
+            result = TaskResult.objects.delete_expired(
+                0, batch_size=10, time_budget=2, pause=1)
+        assert result.deleted == 20
+        assert not result.complete
+        assert TaskResult.objects.count() == 30
+
+        # A new run resumes with the remaining rows
+        result = TaskResult.objects.delete_expired(0, batch_size=10)
+        assert result.deleted == 30
+        assert result.complete
+
+    def test_result_batch_deletion_mysql(self):
+        # Less rows than batch_size deleted: this is the last batch
+        cursor = MagicMock(rowcount=3)
+        db_connection = connections['default']
+        with patch.object(db_connection, 'vendor', 'mysql'), \
+                patch.object(db_connection, 'cursor') as get_cursor:
+            get_cursor.return_value.__enter__.return_value = cursor
+            result = TaskResult.objects.delete_expired(
+                timedelta(days=1), batch_size=10)
+
+        # One statement for the rows with a deadline, one for the others
+        assert result.deleted == 6
+        assert result.batches == 2
+        assert result.complete
+        deletes = [
+            c.args for c in cursor.execute.call_args_list
+            if c.args[0].startswith('DELETE')
+        ]
+        table = '"django_celery_results_taskresult"'
+        assert deletes[0][0] == (
+            f'DELETE FROM {table} '
+            f'WHERE {table}."expires_at" < %s '
+            'ORDER BY "expires_at", "id" LIMIT %s'
+        )
+        sql, params = deletes[1]
+        assert sql == (
+            f'DELETE FROM {table} '
+            f'WHERE ({table}."date_done" < %s '
+            f'AND {table}."expires_at" IS NULL) '
+            'ORDER BY "date_done", "id" LIMIT %s'
+        )
+        assert len(params) == 2
+        assert params[1] == 10
+
+    def test_delete_batched(self):
+        for _ in range(5):
+            self.create_task_result()
+        kept = TaskResult.objects.create(task_id=uuid(), task_name='kept')
+
+        result = TaskResult.objects.delete_batched(
+            TaskResult.objects.filter(task_name__isnull=True), batch_size=2)
+
+        assert result.deleted == 5
+        assert result.batches == 3
+        assert result.complete
+        assert list(TaskResult.objects.all()) == [kept]
+
+    def test_delete_batched_mysql_unfiltered(self):
+        cursor = MagicMock(rowcount=0)
+        db_connection = connections['default']
+        with patch.object(db_connection, 'vendor', 'mysql'), \
+                patch.object(db_connection, 'cursor') as get_cursor:
+            get_cursor.return_value.__enter__.return_value = cursor
+            TaskResult.objects.delete_batched(
+                TaskResult.objects.all(), batch_size=10)
+
+        sql, params = cursor.execute.call_args.args
+        assert sql == ('DELETE FROM "django_celery_results_taskresult" '
+                       'ORDER BY "id" LIMIT %s')
+        assert params == [10]
+
+    def test_result_batch_deletion_throttled(self):
+        self.create_expired_task_results(30)
+        progress = []
+
+        with self.fake_clock() as sleeper:
+            result = TaskResult.objects.delete_expired(
+                0, batch_size=10, rate=5, progress=progress.append)
+
+        assert result.complete
+        assert result.deleted == 30
+        # 10 rows at 5 rows/second: two seconds between batches
+        assert [c.args[0] for c in sleeper.call_args_list] == [2, 2, 2]
+        assert [(p.batch, p.deleted, p.total) for p in progress] == [
+            (1, 10, 10), (2, 10, 20), (3, 10, 30), (4, 0, 30),
+        ]
+
+    def test_result_batch_deletion_waits_for_lag(self):
+        self.create_expired_task_results(10)
+        lag_probe = Mock(side_effect=[30, 12, 3])
+
+        with self.fake_clock() as sleeper:
+            result = TaskResult.objects.delete_expired(
+                0, batch_size=20, lag_probe=lag_probe, max_lag=5, pause=10)
+
+        assert result.complete
+        assert result.deleted == 10
+        assert lag_probe.call_count == 3
+        assert sleeper.call_count == 2
+
+        self.create_expired_task_results(10)
+        lag_probe = Mock(return_value=30)
+        with self.fake_clock():
+            result = TaskResult.objects.delete_expired(
+                0, lag_probe=lag_probe, max_lag=5, time_budget=60)
+        assert result.deleted == 0
+        assert not result.complete
+
+    def test_result_batch_deletion_lag_wait_is_capped(self):
+        self.create_expired_task_results(10)
+
+        # Without a time budget, a lag that never recovers stops the run
+        with self.fake_clock() as sleeper:
+            result = TaskResult.objects.delete_expired(
+                0, lag_probe=Mock(return_value=30), max_lag=5,
+                max_lag_wait=120, pause=30)
+        assert result == (0, 0, 120, False)
+        assert sleeper.call_count == 4
+
+        # So does a failing probe
+        with self.fake_clock() as sleeper:
+            result = TaskResult.objects.delete_expired(
+                0, lag_probe=Mock(side_effect=OSError()), max_lag=5)
+        assert result.deleted == 0
+        assert not result.complete
+        assert not sleeper.called
+        assert TaskResult.objects.count() == 10
+
+    def test_result_retention_policies(self):
+        rows = {
+            key: TaskResult.objects.create(
+                task_id=uuid(), task_name=task_name, status=status)
+            for key, task_name, status in [
+                ('ping_ok', 'proj.ping', states.SUCCESS),
+                ('ping_failed', 'proj.ping', states.FAILURE),
+                ('report_ok', 'proj.reports.daily', states.SUCCESS),
+                ('audit_ok', 'proj.audit', states.SUCCESS),
+                ('unnamed', None, states.SUCCESS),
+            ]
+        }
+        TaskResult.objects.update(date_done=now() - timedelta(days=2))
+        policies = [
+            {'task_name': 'proj.ping', 'status': states.SUCCESS,
+             'expires': timedelta(hours=1)},
+            # Failures are kept longer, whatever the task
+            {'status': [states.FAILURE, states.REVOKED],
+             'expires': timedelta(days=30)},
+            {'task_name': 'proj.reports.*', 'expires': timedelta(days=1)},
+            {'task_name': 'proj.audit', 'expires': None},
+        ]
+
+        result = TaskResult.objects.delete_expired(
+            timedelta(days=7), batch_size=10, policies=policies)
+
+        assert result.deleted == 2
+        assert result.complete
+        assert set(TaskResult.objects.values_list('pk', flat=True)) == {
+            rows['ping_failed'].pk, rows['audit_ok'].pk, rows['unnamed'].pk,
+        }
+
+        # Rows matched by no policy fall back to the default horizon
+        result = TaskResult.objects.delete_expired(
+            timedelta(days=1), policies=policies)
+        assert result.deleted == 1
+        assert not TaskResult.objects.filter(pk=rows['unnamed'].pk).exists()
+
+        # Without a default horizon only the policies apply
+        assert TaskResult.objects.delete_expired(
+            None, policies=policies).deleted == 0
+        assert TaskResult.objects.count() == 2
+
+    def test_result_expires_at(self):
+        due = TaskResult.objects.create(
+            task_id=uuid(), expires_at=now() - timedelta(minutes=1))
+        kept = TaskResult.objects.create(
+            task_id=uuid(), expires_at=now() + timedelta(days=30))
+        legacy = TaskResult.objects.create(task_id=uuid())
+        TaskResult.objects.update(date_done=now() - timedelta(days=10))
+        group = GroupResult.objects.create(
+            group_id=uuid(), expires_at=now() - timedelta(minutes=1))
+
+        # The deadline wins over the expiry horizon, rows stored without
+        # one still use the horizon
+        result = TaskResult.objects.delete_expired(timedelta(days=1))
+        assert result.deleted == 2
+        assert list(TaskResult.objects.all()) == [kept]
+        assert not TaskResult.objects.filter(
+            pk__in=[due.pk, legacy.pk]).exists()
+
+        assert GroupResult.objects.delete_expired(None).deleted == 1
+        assert not GroupResult.objects.filter(pk=group.pk).exists()
+
+    def test_maintenance_statements(self):
+        table = '"django_celery_results_taskresult"'
+        statements = TaskResult.objects.maintenance_statements
+        assert statements('postgresql') == [f'VACUUM (ANALYZE) {table}']
+        assert statements('mysql') == [f'ANALYZE TABLE {table}']
+        assert statements('mysql', optimize=True) == [
+            f'OPTIMIZE TABLE {table}',
+        ]
+        assert statements('oracle') == []
+
+    def test_run_maintenance(self):
+        result = TaskResult.objects.run_maintenance()
+        assert result.statements == [
+            'PRAGMA incremental_vacuum',
+            'ANALYZE "django_celery_results_taskresult"',
+        ]
+
+        # VACUUM cannot run in a transaction
+        with transaction.atomic():
+            assert TaskResult.objects.run_maintenance().statements == []
+
+    def test_task_result_rollup(self):
+        hour = now().replace(minute=0, second=0, microsecond=0)
+        rows = [
+            ('proj.add', states.SUCCESS, hour - timedelta(hours=2), 2),
+            ('proj.add', states.SUCCESS, hour - timedelta(hours=2), 4),
+            ('proj.add', states.FAILURE, hour - timedelta(hours=2), None),
+            ('proj.add', states.SUCCESS, hour - timedelta(hours=1), 1),
+            # Still running, or in the current hour: not rolled up yet
+            ('proj.add', states.STARTED, hour - timedelta(hours=1), None),
+            ('proj.add', states.SUCCESS, hour, 1),
+        ]
+        for task_name, status, date_done, runtime in rows:
+            date_done += timedelta(minutes=10)
+            date_started = None
+            if runtime is not None:
+                date_started = date_done - timedelta(seconds=runtime)
+            task = TaskResult.objects.create(
+                task_id=uuid(), task_name=task_name, status=status,
+                worker='w1')
+            TaskResult.objects.filter(pk=task.pk).update(
+                date_done=date_done, date_started=date_started)
+
+        assert TaskResultRollup.objects.rollup(
+            window=timedelta(hours=1)) == 3
+
+        success = TaskResultRollup.objects.get(
+            period=hour - timedelta(hours=2), status=states.SUCCESS)
+        assert (success.task_name, success.worker) == ('proj.add', 'w1')
+        assert success.count == 2
+        assert success.runtime_count == 2
+        assert success.total_runtime == 6
+        assert success.max_runtime == 4
+        assert success.average_runtime == 3
+        failure = TaskResultRollup.objects.get(status=states.FAILURE)
+        assert failure.count == 1
+        assert failure.average_runtime is None
+        assert failure.max_runtime is None
+
+        # Hours already rolled up are skipped
+        assert TaskResultRollup.objects.rollup() == 0
+        assert TaskResultRollup.objects.rollup(
+            until=hour + timedelta(hours=1)) == 1
+        assert TaskResultRollup.objects.count() == 4
+
+    @patch.dict(managers._seen_facets, clear=True)
+    def test_task_result_facets(self):
+        values = {'task_name': 'proj.add', 'worker': 'w1',
+                  'periodic_task_name': None}
+        TaskResultFacet.objects.record(values)
+        assert list(TaskResultFacet.objects.values_list(
+            'field', 'value')) == [('task_name', 'proj.add'),
+                                   ('worker', 'w1')]
+
+        # Values already recorded by this process are skipped
+        with self.assertNumQueries(0):
+            TaskResultFacet.objects.record(values)
+        TaskResultFacet.objects.record({'task_name': 'proj.mul'})
+        assert list(TaskResultFacet.objects.values_for('task_name')) == [
+            'proj.add', 'proj.mul']
+
+        TaskResult.objects.create(
+            task_id=uuid(), task_name='proj.add', worker='w1')
+        assert TaskResultFacet.objects.prune() == 1
+        assert list(TaskResultFacet.objects.values_for('task_name')) == [
+            'proj.add']
+        assert managers._seen_facets == {}
+
+    @patch.dict(managers._seen_facets, clear=True)
+    def test_task_result_facets_backend(self):
+        self.app.conf.result_extended = True
+        backend = DatabaseBackend(self.app)
+        request = Context(task='proj.add', hostname='w1', args=[], kwargs={})
+        backend.mark_as_done(uuid(), 42, request=request)
+        facets = set(TaskResultFacet.objects.values_list('field', 'value'))
+        assert facets == {('task_name', 'proj.add'), ('worker', 'w1')}
+
+        TaskResult.objects.update(
+            date_done=now() - timedelta(days=2), expires_at=None)
+        backend.cleanup()
+        assert not TaskResultFacet.objects.exists()
+
+    def test_task_result_lineage(self):
+        self.app.conf.result_extended = True
+        backend = DatabaseBackend(self.app)
+        root, child, sibling, grandchild, other = (uuid() for _ in range(5))
+        group_id = uuid()
+        backend.mark_as_done(root, 1, request=Context(
+            id=root, root_id=root, args=[], kwargs={}))
+        for task_id in (child, sibling):
+            backend.mark_as_done(task_id, 2, request=Context(
+                id=task_id, parent_id=root, root_id=root, group=group_id,
+                args=[], kwargs={}))
+        backend.mark_as_failure(grandchild, KeyError(), request=Context(
+            id=grandchild, parent_id=child, root_id=root, args=[],
+            kwargs={}))
+        backend.mark_as_done(other, 3, request=Context(
+            id=other, root_id=other, args=[], kwargs={}))
+
+        result = TaskResult.objects.get(task_id=grandchild)
+        assert (result.parent_id, result.root_id, result.group_id) == (
+            child, root, None)
+        with self.assertNumQueries(1):
+            assert [r.task_id for r in TaskResult.objects.get_workflow(
+                root)] == [root, child, sibling, grandchild]
+        assert [r.task_id for r in TaskResult.objects.get_workflow_failures(
+            root)] == [grandchild]
+        assert [r.task_id for r in TaskResult.objects.get_children(
+            root)] == [child, sibling]
+        assert [r.task_id for r in TaskResult.objects.get_group_tasks(
+            group_id)] == [child, sibling]
+
+    def test_chord_counter_expired(self):
+        old = ChordCounter.objects.create(
+            group_id=uuid(), sub_tasks='ids:', count=1)
+        new = ChordCounter.objects.create(
+            group_id=uuid(), sub_tasks='ids:', count=1)
+        ChordCounter.objects.filter(pk=old.pk).update(
+            date_created=now() - timedelta(days=10),
+            date_updated=now() - timedelta(days=10))
+        # Long running chords are kept while their header makes progress
+        ChordCounter.objects.filter(pk=new.pk).update(
+            date_created=now() - timedelta(days=10))
+
+        assert list(ChordCounter.objects.get_all_expired(
+            self.app.conf.result_expires)) == [old]
+
+        ChordCounter.objects.delete_expired(self.app.conf.result_expires)
+        assert list(ChordCounter.objects.all()) == [new]
+
+    def test_chord_counter_stalled(self):
+        stalled = ChordCounter.objects.create(
+            group_id=uuid(), sub_tasks='ids:', count=2)
+        ChordCounter.objects.create(
+            group_id=uuid(), sub_tasks='ids:', count=2)
+        ChordCounter.objects.filter(pk=stalled.pk).update(
+            date_updated=now() - timedelta(hours=2))
+
+        assert list(ChordCounter.objects.get_stalled(3600)) == [stalled]
+        assert list(ChordCounter.objects.get_stalled(
+            timedelta(hours=3))) == []
+
 
 @pytest.mark.usefixtures('depends_on_current_app')
 class test_ModelsWithoutDefaultDB(TransactionTestCase):
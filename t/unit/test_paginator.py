@@ -0,0 +1,81 @@
+from unittest import mock
+
+from celery import uuid
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_celery_results import paginator
+from django_celery_results.models import TaskResult
+from django_celery_results.paginator import (
+    EstimatedCountPaginator,
+    estimate_count,
+)
+
+THRESHOLD = {'ADMIN_ESTIMATED_COUNT_THRESHOLD': 1000}
+
+
+class test_EstimatedCountPaginator(TestCase):
+
+    def setUp(self):
+        for _ in range(3):
+            TaskResult.objects.create(task_id=uuid(), task_name='test')
+
+    def count(self, qs):
+        return EstimatedCountPaginator(qs, 10).count
+
+    def test_no_estimate_on_sqlite(self):
+        assert estimate_count(TaskResult) is None
+
+    @override_settings(DJANGO_CELERY_RESULTS=THRESHOLD)
+    @mock.patch.object(paginator, 'estimate_count', return_value=5000)
+    def test_estimate_large_table(self, estimate):
+        assert self.count(TaskResult.objects.all()) == 5000
+        estimate.assert_called_once_with(TaskResult, 'default')
+
+    @override_settings(DJANGO_CELERY_RESULTS=THRESHOLD)
+    @mock.patch.object(paginator, 'estimate_count', return_value=500)
+    def test_exact_count_small_table(self, estimate):
+        assert self.count(TaskResult.objects.all()) == 3
+
+    @override_settings(DJANGO_CELERY_RESULTS=THRESHOLD)
+    @mock.patch.object(paginator, 'estimate_count', return_value=5000)
+    def test_exact_count_filtered(self, estimate):
+        qs = TaskResult.objects.filter(task_name='test')
+        assert self.count(qs) == 3
+        estimate.assert_not_called()
+
+    @mock.patch.object(paginator, 'estimate_count', return_value=5000)
+    def test_disabled_without_threshold(self, estimate):
+        assert self.count(TaskResult.objects.all()) == 3
+        estimate.assert_not_called()
+
+
+class test_ChangelistCounts(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@test.com', password='password')
+        self.client.force_login(user)
+        TaskResult.objects.create(task_id=uuid(), task_name='test')
+        self.url = reverse('admin:django_celery_results_taskresult_changelist')
+
+    @override_settings(DJANGO_CELERY_RESULTS=THRESHOLD)
+    @mock.patch.object(paginator, 'estimate_count', return_value=5000)
+    def test_large_table(self, estimate):
+        response = self.client.get(self.url, {'task_name': 'test'})
+        cl = response.context['cl']
+        assert cl.result_count == 1
+        assert not cl.show_full_result_count
+
+        response = self.client.get(self.url)
+        assert response.context['cl'].result_count == 5000
+
+    @override_settings(DJANGO_CELERY_RESULTS=THRESHOLD)
+    @mock.patch.object(paginator, 'estimate_count', return_value=10)
+    def test_small_table(self, estimate):
+        response = self.client.get(self.url, {'task_name': 'test'})
+        cl = response.context['cl']
+        assert cl.result_count == 1
+        assert cl.show_full_result_count
+        assert cl.full_result_count == 1
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db import connection
+from django.test import TransactionTestCase
+
+from django_celery_results import partitioning
+from django_celery_results.models import TaskResult
+from django_celery_results.utils import now
+
+
+def fake_connection(rows):
+    db = MagicMock(vendor='postgresql', alias='default')
+    db.ops.quote_name = lambda name: f'"{name}"'
+    cursor = db.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = rows
+    cursor.fetchone.return_value = None
+    return db, cursor
+
+
+def executed(cursor):
+    return [c.args[0] for c in cursor.execute.call_args_list]
+
+
+class test_PartitionRanges:
+
+    def test_daily(self):
+        start = datetime(2024, 3, 31, 15, 42, tzinfo=timezone.utc)
+        ranges = list(partitioning.partition_ranges(start, 2, 'day'))
+        assert [suffix for suffix, _, _ in ranges] == ['20240331', '20240401']
+        assert ranges[0][1] == datetime(2024, 3, 31, tzinfo=timezone.utc)
+        assert ranges[1][2] == datetime(2024, 4, 2, tzinfo=timezone.utc)
+
+    def test_hourly(self):
+        start = datetime(2024, 3, 31, 23, 42, tzinfo=timezone.utc)
+        ranges = list(partitioning.partition_ranges(start, 2, 'hour'))
+        assert [suffix for suffix, _, _ in ranges] == [
+            '2024033123', '2024040100',
+        ]
+
+    def test_unknown_interval(self):
+        with pytest.raises(ValueError):
+            partitioning.get_interval('week')
+
+    def test_cutoff_uses_longest_horizon(self):
+        cutoff = partitioning.get_partition_cutoff(
+            86400, [{'status': 'FAILURE', 'expires': timedelta(days=30)}])
+        expected = datetime.now(timezone.utc) - timedelta(days=30)
+        assert abs(cutoff - expected) < timedelta(minutes=1)
+        # A policy keeping results forever prevents dropping partitions
+        assert partitioning.get_partition_cutoff(
+            86400, [{'status': 'FAILURE', 'expires': None}]) is None
+        assert partitioning.get_partition_cutoff(None) is None
+
+
+class test_Partitions:
+
+    def test_get_partitions(self):
+        db, _ = fake_connection([
+            ('t_p20240101', "FOR VALUES FROM ('2024-01-01 00:00:00+00') "
+                            "TO ('2024-01-02 00:00:00+00')"),
+            ('t_default', 'DEFAULT'),
+        ])
+        assert partitioning.get_partitions(db, 't') == [
+            ('t_p20240101', datetime(2024, 1, 2, tzinfo=timezone.utc)),
+            ('t_default', None),
+        ]
+
+    def test_create_partitions_after_existing_ones(self):
+        table = TaskResult._meta.db_table
+        db, cursor = fake_connection([
+            (f'{table}_legacy', "FOR VALUES FROM (MINVALUE) "
+                                "TO ('2024-01-01 12:00:00+00')"),
+        ])
+        start = datetime(2024, 1, 1, 8, tzinfo=timezone.utc)
+
+        with patch.object(partitioning, 'transaction'):
+            created = partitioning.create_partitions(
+                db, TaskResult, 2, 'day', start=start)
+
+        assert created == [f'{table}_p20240101', f'{table}_p20240102']
+        # The first partition starts where the legacy one ends
+        lower, upper = cursor.execute.call_args_list[1].args[1]
+        assert lower == datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+        assert upper == datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    def test_drop_expired_partitions(self):
+        table = TaskResult._meta.db_table
+        old = datetime.now(timezone.utc) - timedelta(days=3)
+        db, cursor = fake_connection([
+            (f'{table}_p1', f"FOR VALUES FROM (MINVALUE) "
+                            f"TO ('{old.isoformat()}')"),
+            (f'{table}_p2', f"FOR VALUES FROM ('{old.isoformat()}') "
+                            f"TO ('{datetime.now(timezone.utc)}')"),
+            (f'{table}_default', 'DEFAULT'),
+        ])
+
+        with patch.object(partitioning, 'transaction'):
+            dropped = partitioning.drop_expired_partitions(
+                db, TaskResult, timedelta(days=1))
+
+        assert dropped == [f'{table}_p1']
+        assert executed(cursor)[-2:] == [
+            f'ALTER TABLE "{table}" DETACH PARTITION "{table}_p1"',
+            f'DROP TABLE "{table}_p1"',
+        ]
+
+    def test_keep_partitions_with_pending_deadlines(self):
+        table = TaskResult._meta.db_table
+        old = datetime.now(timezone.utc) - timedelta(days=3)
+        db, cursor = fake_connection([
+            (f'{table}_p1', f"FOR VALUES FROM (MINVALUE) "
+                            f"TO ('{old.isoformat()}')"),
+        ])
+        cursor.fetchone.return_value = (1,)
+
+        with patch.object(partitioning, 'transaction'):
+            assert partitioning.drop_expired_partitions(
+                db, TaskResult, timedelta(days=1)) == []
+        assert not any(sql.startswith('DROP') for sql in executed(cursor))
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql',
+                    reason='Partitioning requires PostgreSQL')
+class test_PartitionedTable(TransactionTestCase):
+
+    def test_setup_and_drop(self):
+        TaskResult.objects.create(task_id='legacy')
+        table = TaskResult._meta.db_table
+        partitioning.setup_partitioning(connection, TaskResult, 'day')
+        try:
+            assert partitioning.is_partitioned(connection, table)
+            # The indexes of the model keep their names
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT indexname FROM pg_indexes WHERE tablename = %s',
+                    [table])
+                names = {row[0] for row in cursor.fetchall()}
+            assert {index.name for index in TaskResult._meta.indexes} <= names
+
+            # A row done tomorrow lands in the default partition
+            TaskResult.objects.store_result(
+                'application/json', 'utf-8', 'new', '1', 'SUCCESS')
+            TaskResult.objects.filter(task_id='new').update(
+                date_done=now() + timedelta(days=1))
+            created = partitioning.create_partitions(
+                connection, TaskResult, 2, 'day')
+            assert len(created) == 1
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT task_id FROM {created[0]}')
+                assert cursor.fetchall() == [('new',)]
+
+            TaskResult.objects.store_result(
+                'application/json', 'utf-8', 'new', '2', 'SUCCESS')
+            assert sorted(TaskResult.objects.values_list(
+                'task_id', flat=True)) == ['legacy', 'new']
+        finally:
+            # Bring the original table back for the other tests
+            partitioning._partitioned.clear()
+            with connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {table} '
+                               f'DETACH PARTITION {table}_legacy')
+                cursor.execute(f'DROP TABLE {table} CASCADE')
+                cursor.execute(f'ALTER TABLE {table}_legacy '
+                               f'RENAME TO {table}')
+                cursor.execute(f'ALTER TABLE {table} '
+                               f'DROP CONSTRAINT {table}_legacy_bound')
+                cursor.execute(f'ALTER TABLE {table} '
+                               f'DROP CONSTRAINT {table}_legacy_pkey')
+                cursor.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id)')
+                for index in TaskResult._meta.indexes:
+                    cursor.execute(f'ALTER INDEX {index.name}_legacy '
+                                   f'RENAME TO {index.name}')
+                cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id '
+                               f'ADD GENERATED BY DEFAULT AS IDENTITY '
+                               f'(START WITH 1000)')
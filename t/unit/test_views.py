@@ -1,18 +1,29 @@
+import asyncio
 import json
 
+import django
 import pytest
+from asgiref.sync import sync_to_async
 from celery import states, uuid
 from celery.result import AsyncResult
 from celery.result import GroupResult as CeleryGroupResult
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.test.client import RequestFactory
 
 from django_celery_results.models import GroupResult, TaskResult
 from django_celery_results.views import (
+    group_progress,
     group_status,
+    group_status_async,
     is_group_successful,
+    is_group_successful_async,
     is_task_successful,
+    is_task_successful_async,
+    stream_status,
     task_status,
+    task_status_async,
+    tasks_status,
+    wait_status,
 )
 
 
@@ -111,3 +122,300 @@ class test_Views(TestCase):
         result = json.loads(response.content.decode('utf-8'))
         assert len(result["group"]["results"]) == 1
         assert result["group"]["results"][0]["status"] == states.SUCCESS
+
+    def test_tasks_status(self):
+        done = self.create_task_result()
+        TaskResult.objects.filter(pk=done.pk).update(status=states.SUCCESS)
+        started = self.create_task_result()
+        TaskResult.objects.filter(pk=started.pk).update(
+            status=states.STARTED)
+        unknown = uuid()
+        expected = {'tasks': {
+            done.task_id: states.SUCCESS,
+            started.task_id: states.STARTED,
+            unknown: states.PENDING,
+        }}
+
+        request = self.factory.get('/tasks/status/', {'ids': [
+            f'{done.task_id},{started.task_id}', unknown, done.task_id,
+        ]})
+        with override_settings(DJANGO_CELERY_RESULTS={'BULK_CHUNK_SIZE': 2}), \
+                self.assertNumQueries(2):
+            response = tasks_status(request)
+        assert json.loads(response.content) == expected
+
+        request = self.factory.post(
+            '/tasks/status/',
+            json.dumps({'ids': [done.task_id, started.task_id, unknown]}),
+            content_type='application/json',
+        )
+        assert json.loads(tasks_status(request).content) == expected
+
+        request = self.factory.post('/tasks/status/', {'ids': [
+            done.task_id, started.task_id, unknown]})
+        assert json.loads(tasks_status(request).content) == expected
+
+    def test_tasks_status_invalid(self):
+        request = self.factory.post(
+            '/tasks/status/', json.dumps({'ids': 'a,b'}),
+            content_type='application/json')
+        assert tasks_status(request).status_code == 400
+
+        request = self.factory.post(
+            '/tasks/status/', json.dumps({'tasks': ['a']}),
+            content_type='application/json')
+        assert tasks_status(request).status_code == 400
+
+        request = self.factory.get('/tasks/status/', {'ids': 'a,b,c'})
+        with override_settings(
+                DJANGO_CELERY_RESULTS={'STATUS_BATCH_MAX_IDS': 2}):
+            response = tasks_status(request)
+        assert response.status_code == 400
+        assert 'At most 2 ids' in json.loads(response.content)['error']
+
+    def test_task_status_conditional(self):
+        taskmeta = self.create_task_result()
+        response = task_status(self.factory.get('/'), taskmeta.task_id)
+        etag = response.headers['ETag']
+        assert 'no-cache' in response.headers['Cache-Control']
+        assert 'Last-Modified' in response.headers
+
+        with self.assertNumQueries(1):
+            response = task_status(
+                self.factory.get('/', HTTP_IF_NONE_MATCH=etag),
+                taskmeta.task_id,
+            )
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+
+        TaskResult.objects.store_result(
+            'application/json', 'utf-8', taskmeta.task_id,
+            json.dumps({'result': True}), status=states.SUCCESS,
+        )
+        response = task_status(
+            self.factory.get('/', HTTP_IF_NONE_MATCH=etag), taskmeta.task_id)
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        cache_control = response.headers['Cache-Control']
+        assert 'max-age=86400' in cache_control
+        assert 'private' in cache_control
+
+        with override_settings(DJANGO_CELERY_RESULTS={
+                'STATUS_CACHE_CONTROL': {'public': True, 'max_age': 60}}):
+            response = task_status(self.factory.get('/'), taskmeta.task_id)
+        assert response.headers['Cache-Control'] in (
+            'public, max-age=60', 'max-age=60, public')
+
+    def test_group_status_conditional(self):
+        meta = self.create_group_result()
+        response = group_status(self.factory.get('/'), meta.group_id)
+        etag = response.headers['ETag']
+        assert 'max-age=86400' in response.headers['Cache-Control']
+
+        # One query to restore the group, one for its tasks
+        with self.assertNumQueries(2):
+            response = group_status(
+                self.factory.get('/', HTTP_IF_NONE_MATCH=etag),
+                meta.group_id,
+            )
+        assert response.status_code == 304
+
+        pending = AsyncResult(id=uuid())
+        group = CeleryGroupResult(id=uuid(), results=[pending])
+        group.save()
+        response = group_status(self.factory.get('/'), group.id)
+        assert 'no-cache' in response.headers['Cache-Control']
+
+    def test_group_views_chunked(self):
+        task_ids = [uuid() for _ in range(5)]
+        for task_id in task_ids[:3]:
+            self.set_status(task_id, states.SUCCESS)
+        group = CeleryGroupResult(
+            id=uuid(), results=[AsyncResult(id=i) for i in task_ids])
+        group.save()
+        request = self.factory.get('/')
+
+        settings = {'BULK_CHUNK_SIZE': 2}
+        with override_settings(DJANGO_CELERY_RESULTS=settings):
+            # One query to restore the group, one per chunk of tasks
+            with self.assertNumQueries(4):
+                response = is_group_successful(request, group.id)
+            # The validators count the tasks with one more query per chunk
+            with self.assertNumQueries(7):
+                response = group_status(request, group.id)
+        results = json.loads(response.content)['group']['results']
+        assert [r['status'] for r in results] == [states.SUCCESS] * 3 + [
+            states.PENDING] * 2
+
+        settings['STATUS_STREAM_GROUP_SIZE'] = 4
+        with override_settings(DJANGO_CELERY_RESULTS=settings):
+            streamed = group_status(request, group.id)
+            assert streamed.streaming
+            assert streamed.headers['ETag'] == response.headers['ETag']
+            assert b''.join(streamed) == response.content
+            response = is_group_successful(request, uuid())
+            assert not response.streaming
+            assert json.loads(response.content)['group']['results'] == []
+
+    def test_group_progress(self):
+        meta = self.create_group_result()
+        response = group_progress(self.factory.get('/'), meta.group_id)
+        assert json.loads(response.content) == {'group': {
+            'id': meta.group_id, 'total': 1, 'completed': 1, 'failed': 0,
+            'ready': True, 'states': {states.SUCCESS: 1},
+        }}
+        response = group_progress(self.factory.get('/'), uuid())
+        assert response.status_code == 404
+
+    def set_status(self, task_id, status):
+        TaskResult.objects.update_or_create(
+            task_id=task_id, defaults={'status': status})
+
+    @override_settings(DJANGO_CELERY_RESULTS={'STATUS_POLL_INTERVAL': 0.01})
+    async def test_wait_status(self):
+        done, pending = uuid(), uuid()
+        await sync_to_async(self.set_status)(done, states.SUCCESS)
+        request = self.factory.get('/', {'ids': [done, pending]})
+        response = await wait_status(request)
+        assert json.loads(response.content) == {'tasks': {
+            done: states.SUCCESS, pending: states.PENDING,
+        }}
+        assert 'no-store' in response.headers['Cache-Control']
+
+        # Without waiting, the current states are still read
+        request = self.factory.get('/', {'ids': [done, pending],
+                                         'timeout': 0})
+        response = await wait_status(request)
+        assert json.loads(response.content) == {'tasks': {
+            done: states.SUCCESS, pending: states.PENDING,
+        }}
+
+        # Nothing finishes: the answer comes after the timeout
+        request = self.factory.get('/', {'ids': pending, 'timeout': 0.05})
+        response = await wait_status(request)
+        assert json.loads(response.content) == {'tasks': {
+            pending: states.PENDING,
+        }}
+
+    @override_settings(DJANGO_CELERY_RESULTS={'STATUS_POLL_INTERVAL': 0.01})
+    async def test_wait_status_until_done(self):
+        task_id = uuid()
+        request = self.factory.get('/', {'ids': task_id})
+        waiting = asyncio.ensure_future(wait_status(request))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        await sync_to_async(self.set_status)(task_id, states.FAILURE)
+        response = await asyncio.wait_for(waiting, 5)
+        assert json.loads(response.content) == {'tasks': {
+            task_id: states.FAILURE,
+        }}
+
+    @override_settings(DJANGO_CELERY_RESULTS={'STATUS_POLL_INTERVAL': 0.01})
+    async def test_wait_status_group(self):
+        meta = await sync_to_async(self.create_group_result)()
+        request = self.factory.get('/', {'groups': meta.group_id})
+        response = await wait_status(request)
+        assert json.loads(response.content)['groups'] == {
+            meta.group_id: {'completed': 1, 'total': 1},
+        }
+
+    async def test_wait_status_invalid(self):
+        response = await wait_status(self.factory.get('/'))
+        assert response.status_code == 400
+        response = await wait_status(self.factory.get('/', {'groups': 'x'}))
+        assert response.status_code == 404
+        response = await wait_status(self.factory.post('/', {'ids': 'x'}))
+        assert response.status_code == 405
+
+    @pytest.mark.skipif(django.VERSION < (4, 2),
+                        reason='Streams asynchronous iterators')
+    @override_settings(DJANGO_CELERY_RESULTS={'STATUS_POLL_INTERVAL': 0.01})
+    async def test_stream_status(self):
+        meta = await sync_to_async(self.create_group_result)()
+        task_id = uuid()
+        await sync_to_async(self.set_status)(task_id, states.STARTED)
+        request = self.factory.get(
+            '/', {'ids': task_id, 'groups': meta.group_id})
+        response = await stream_status(request)
+        assert response['Content-Type'] == 'text/event-stream'
+
+        events = []
+        async for chunk in response.streaming_content:
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            events.append(chunk)
+            if len(events) == 2:
+                await sync_to_async(self.set_status)(task_id, states.SUCCESS)
+        assert events == [
+            'event: task\ndata: {"id": "%s", "status": "STARTED"}\n\n'
+            % task_id,
+            'event: group\ndata: {"id": "%s", "completed": 1, "total": 1}'
+            '\n\n' % meta.group_id,
+            'event: task\ndata: {"id": "%s", "status": "SUCCESS"}\n\n'
+            % task_id,
+            'event: done\ndata: {}\n\n',
+        ]
+
+    def create_failed_group(self):
+        failed = uuid()
+        self.app.backend.store_result(
+            failed, KeyError('missing'), states.FAILURE, traceback='tb')
+        group = CeleryGroupResult(id=uuid(), results=[
+            AsyncResult(id=failed), AsyncResult(id=uuid()),
+        ])
+        group.save()
+        return failed, group
+
+    @pytest.mark.skipif(django.VERSION < (4, 1),
+                        reason='Uses the asynchronous ORM')
+    async def test_async_views(self):
+        meta = await sync_to_async(self.create_group_result)()
+        failed, group = await sync_to_async(self.create_failed_group)()
+        # The test runs in the thread of its event loop
+        self.app.set_current()
+
+        for task_id in (failed, uuid()):
+            request = self.factory.get('/')
+            expected = await sync_to_async(task_status)(request, task_id)
+            response = await task_status_async(request, task_id)
+            assert json.loads(response.content) == json.loads(
+                expected.content)
+            assert response.headers['ETag'] == expected.headers['ETag']
+            expected = await sync_to_async(is_task_successful)(
+                request, task_id)
+            response = await is_task_successful_async(request, task_id)
+            assert response.content == expected.content
+
+        request = self.factory.get('/')
+        for group_id in (meta.group_id, group.id, uuid()):
+            expected = await sync_to_async(is_group_successful)(
+                request, group_id)
+            response = await is_group_successful_async(request, group_id)
+            assert response.content == expected.content
+        response = await group_status_async(request, meta.group_id)
+        expected = await sync_to_async(group_status)(request, meta.group_id)
+        assert response.content == expected.content
+        assert response.headers['ETag'] == expected.headers['ETag']
+        response = await group_status_async(request, group.id)
+        assert json.loads(response.content)['group']['results'] == [
+            {'result': "KeyError('missing')", 'status': states.FAILURE},
+            {'result': None, 'status': states.PENDING},
+        ]
+
+        request = self.factory.get(
+            '/', HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        response = await group_status_async(request, group.id)
+        assert response.status_code == 304
+
+        with override_settings(DJANGO_CELERY_RESULTS={
+                'BULK_CHUNK_SIZE': 1, 'STATUS_STREAM_GROUP_SIZE': 1}):
+            response = await is_group_successful_async(
+                self.factory.get('/'), group.id)
+            if response.streaming:
+                content = b''.join([
+                    chunk async for chunk in response.streaming_content])
+            else:
+                content = response.content
+        assert json.loads(content) == {'group': {'id': group.id, 'results': [
+            {'id': failed, 'executed': False},
+            {'id': group.results[1].id, 'executed': False},
+        ]}}